@@ -1,6 +1,7 @@
 # -*- coding: utf-8
 
 import os
+import tempfile
 
 DEBUG = True
 DEBUG_PROPAGATE_EXCEPTIONS = True
@@ -11,7 +12,19 @@ DATABASES = {
         "NAME": os.environ.get("DATABASE_NAME", ":memory:"),
         'USER': os.environ.get("DATABASE_USER", ""),
         'PASSWORD': os.environ.get("DATABASE_PASSWORD", ""),
-    }
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "files": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "tximmutability-tests"),
+    },
 }
 
 INSTALLED_APPS = ['django.contrib.contenttypes', "tests.testapp"]
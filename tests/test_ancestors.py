@@ -0,0 +1,179 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import ModelDepthFoo
+from tximmutability.deferred import deferred_validation
+from tximmutability.index import LockedPkIndex
+from tximmutability.rule import MutabilityRule
+
+RULE = MutabilityRule(
+    "state", values=(ModelState.MUTABLE_STATE,), ancestors="related_field"
+)
+
+
+def make_chain(length, root_state=ModelState.IMMUTABLE_STATE):
+    """
+    Chain of ModelDepthFoo, the first one is the root.
+    """
+    parent = ModelDepthFoo.objects.create(state=root_state)
+    chain = [parent]
+    for x in range(length - 1):
+        parent = ModelDepthFoo.objects.create(related_field=parent)
+        chain.append(parent)
+    return chain
+
+
+@pytest.mark.django_db
+def test_ancestors_instance(django_assert_num_queries):
+    """
+    Test - an instance is immutable if an ancestor is, its ancestors are
+    checked with one query.
+    """
+    root, first, second, leaf = make_chain(4)
+    leaf = ModelDepthFoo.objects.get(pk=leaf.pk)
+    # Saved value of the instance + its ancestors.
+    with django_assert_num_queries(2):
+        is_mutable, failed_instances = RULE.is_mutable(leaf, "update")
+    assert failed_instances == [leaf]
+    unlocked = make_chain(4, root_state=ModelState.MUTABLE_STATE)
+    assert RULE.is_mutable(unlocked[-1], "update")[0]
+
+
+@pytest.mark.django_db
+def test_ancestors_max_depth(settings):
+    """
+    Test - ancestors are checked up to max_depth levels, the
+    ANCESTORS_MAX_DEPTH setting by default.
+    """
+    root, first, second, leaf = make_chain(4)
+    rule = MutabilityRule(
+        "state",
+        values=(ModelState.MUTABLE_STATE,),
+        ancestors="related_field",
+        max_depth=2,
+    )
+    assert rule.is_mutable(leaf, "update")[0]
+    assert not rule.is_mutable(second, "update")[0]
+    queryset = ModelDepthFoo.objects.order_by('pk')
+    assert rule.is_mutable(queryset, "update")[1] == [root, first, second]
+    settings.TXIMMUTABILITY_ANCESTORS_MAX_DEPTH = 1
+    assert RULE.is_mutable(second, "update")[0]
+    assert RULE.is_mutable(queryset, "update")[1] == [root, first]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compiled", [True, False])
+def test_ancestors_queryset(compiled, django_assert_max_num_queries):
+    """
+    Test - the rows of a queryset with an immutable ancestor are found with
+    one query.
+    """
+    locked = make_chain(4)
+    make_chain(3, root_state=ModelState.MUTABLE_STATE)
+    queryset = ModelDepthFoo.objects.order_by('pk')
+    # Compiled: one query. Python: rows + ancestors + saved values.
+    with django_assert_max_num_queries(1 if compiled else 2 + 7):
+        is_mutable, failed_instances = RULE.is_mutable(
+            queryset, "update", compiled=compiled
+        )
+    assert failed_instances == locked
+
+
+@pytest.mark.django_db
+def test_ancestors_failed_instances(django_assert_num_queries):
+    """
+    Test - instances validated together are checked with one query.
+    """
+    locked = make_chain(3)
+    unlocked = make_chain(3, root_state=ModelState.MUTABLE_STATE)
+    with django_assert_num_queries(1):
+        failed_instances = RULE.get_failed_instances(locked[1:] + unlocked)
+    assert failed_instances == locked[1:]
+
+
+@pytest.mark.django_db
+def test_ancestors_cycle():
+    """
+    Test - a cycle of parents ends at the depth limit.
+    """
+    first = ModelDepthFoo.objects.create(state=ModelState.MUTABLE_STATE)
+    second = ModelDepthFoo.objects.create(related_field=first)
+    ModelDepthFoo.objects.filter(pk=first.pk).update(related_field=second)
+    first.refresh_from_db()
+    assert RULE.is_mutable(first, "update")[0]
+    assert RULE.is_mutable(ModelDepthFoo.objects.all(), "update")[0]
+    ModelDepthFoo.objects.filter(pk=second.pk).update(state=ModelState.IMMUTABLE_STATE)
+    assert not RULE.is_mutable(first, "update")[0]
+
+
+@pytest.mark.django_db
+def test_ancestors_save(monkeypatch):
+    """
+    Test - a model with a rule with ancestors can not be updated under an
+    immutable ancestor.
+    """
+    monkeypatch.setattr(ModelDepthFoo, "_mutability_rules", (RULE,))
+    root, parent, child = make_chain(3)
+    child.name = "changed"
+    with pytest.raises(ValidationError):
+        child.save()
+    with pytest.raises(ValidationError):
+        ModelDepthFoo.objects.filter(pk=child.pk).update(name="changed")
+    other = ModelDepthFoo.objects.create()
+    other.name = "changed"
+    other.save()
+
+
+def test_ancestors_rule_key():
+    """
+    Test - ancestors and max_depth are part of what the rule checks.
+    """
+    same_rule = MutabilityRule(
+        "state", values=(ModelState.MUTABLE_STATE,), ancestors="related_field"
+    )
+    other_rule = MutabilityRule(
+        "state",
+        values=(ModelState.MUTABLE_STATE,),
+        ancestors="related_field",
+        max_depth=3,
+    )
+    assert RULE == same_rule
+    assert RULE.fingerprint == same_rule.fingerprint
+    assert RULE != other_rule
+    assert RULE.fingerprint != other_rule.fingerprint
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "field_rule, ancestors", [("state", "name"), ("related_field", "related_field")]
+)
+def test_ancestors_improperly_configured(field_rule, ancestors):
+    rule = MutabilityRule(field_rule, values=(None,), ancestors=ancestors)
+    with pytest.raises(ImproperlyConfigured):
+        rule.get_row_q(ModelDepthFoo)
+
+
+@pytest.mark.django_db
+def test_ancestors_deferred_validation(monkeypatch):
+    """
+    Test - a row whose field_rule changed in a deferred_validation() block
+    is still checked against its ancestors.
+    """
+    monkeypatch.setattr(ModelDepthFoo, "_mutability_rules", (RULE,))
+    root, parent, child = make_chain(3)
+    with pytest.raises(ValidationError):
+        with deferred_validation():
+            child.name = "changed"
+            child.state = ModelState.IMMUTABLE_STATE
+            child.save()
+    assert ModelDepthFoo.objects.get(pk=child.pk).state == ModelState.MUTABLE_STATE
+
+
+def test_ancestors_not_indexed():
+    """
+    Test - rules with ancestors depend on other rows, they are not kept in
+    the locked pk index.
+    """
+    index = LockedPkIndex(ModelDepthFoo)
+    assert not index.is_indexed(RULE)
@@ -264,3 +264,45 @@ class TestModelExcludeUpdate(MixinTest):
         self.update_field_when_model_is_immutable(
             immutable_instance, field_name, expectation
         )
+
+
+@pytest.mark.django_db
+def test_save_update_fields_narrows_validation(
+    base_immutable_instance, django_assert_num_queries
+):
+    """
+    Test - save(update_fields=...) validates only the given fields, changes of
+    other fields are not saved and do not apply the rules.
+    """
+    base_immutable_instance._mutability_rules = (
+        MutabilityRule(
+            "state",
+            values=(ModelState.MUTABLE_STATE,),
+            exclude_fields=("description",),
+        ),
+    )
+    base_immutable_instance.description = "allowed"
+    base_immutable_instance.name = "not saved"
+    with django_assert_num_queries(1):
+        base_immutable_instance.save(update_fields=["description"])
+    base_immutable_instance.refresh_from_db()
+    assert base_immutable_instance.description == "allowed"
+    assert base_immutable_instance.name == BaseMutabilityModel.DEFAULT_NAME
+
+    base_immutable_instance.description = "not allowed"
+    with pytest.raises(RuleMutableException):
+        base_immutable_instance.save(update_fields=["description", "name"])
+
+
+@pytest.mark.django_db
+def test_save_update_fields_skips_tracker(base_immutable_instance, monkeypatch):
+    base_immutable_instance._mutability_rules = (
+        MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    monkeypatch.setattr(
+        type(base_immutable_instance.tracker),
+        "changed",
+        lambda tracker: pytest.fail("tracker diff"),
+    )
+    base_immutable_instance.state = ModelState.MUTABLE_STATE
+    base_immutable_instance.save(update_fields=["state"])
@@ -0,0 +1,124 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models.signals import pre_delete
+from django.test.utils import CaptureQueriesContext
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelFooReverse
+from tximmutability.rule import MutabilityRule
+
+STATE_RULE = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+
+
+@pytest.fixture
+def parent_instance(monkeypatch, base_mutable_instance):
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (STATE_RULE,))
+    monkeypatch.setattr(ModelFooReverse, "_mutability_rules", (STATE_RULE,))
+    return base_mutable_instance
+
+
+@pytest.mark.django_db
+def test_cascade_delete_immutable_child(parent_instance):
+    """
+    Test - an immutable object deleted on cascade rejects the delete of the
+    parent and nothing is deleted.
+    """
+    ModelFooReverse.objects.create(
+        related_field=parent_instance, state=ModelState.MUTABLE_STATE
+    )
+    ModelFooReverse.objects.create(
+        related_field=parent_instance, state=ModelState.IMMUTABLE_STATE
+    )
+    with pytest.raises(ValidationError):
+        parent_instance.delete(validate_cascade=True)
+    assert BaseModel.objects.count() == 1
+    assert ModelFooReverse.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_cascade_delete_immutable_nested_child(parent_instance):
+    """
+    Test - objects collected at any depth of the cascade are validated.
+    """
+    child = BaseModel.objects.create(
+        own_related_field=parent_instance, state=ModelState.MUTABLE_STATE
+    )
+    ModelFooReverse.objects.create(
+        related_field=child, state=ModelState.IMMUTABLE_STATE
+    )
+    with pytest.raises(ValidationError):
+        parent_instance.delete(validate_cascade=True)
+    assert BaseModel.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_cascade_delete_mutable_children(parent_instance):
+    """
+    Test - mutable children are validated with one query by model and deleted.
+    """
+    for x in range(5):
+        ModelFooReverse.objects.create(
+            related_field=parent_instance, state=ModelState.MUTABLE_STATE
+        )
+    with CaptureQueriesContext(connection) as context:
+        parent_instance.delete(validate_cascade=True)
+    rule_queries = [
+        query["sql"]
+        for query in context.captured_queries
+        if ModelState.MUTABLE_STATE in query["sql"]
+    ]
+    assert len(rule_queries) == 1
+    assert "testapp_modelfooreverse" in rule_queries[0]
+    assert BaseModel.objects.count() == 0
+    assert ModelFooReverse.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_cascade_delete_not_validated_by_default(parent_instance):
+    """
+    Test - without validate_cascade the objects deleted on cascade are not
+    validated.
+    """
+    ModelFooReverse.objects.create(
+        related_field=parent_instance, state=ModelState.IMMUTABLE_STATE
+    )
+    parent_instance.delete()
+    assert ModelFooReverse.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_cascade_delete_instance_method_condition(
+    request, monkeypatch, parent_instance
+):
+    """
+    Test - instance methods conditions of the collected objects are checked in
+    memory, like their delete().
+    """
+    # a pre_delete receiver makes Django collect the children instead of
+    # fast deleting them
+    receiver = mock.Mock()
+    pre_delete.connect(receiver, sender=ModelFooReverse)
+    request.addfinalizer(
+        lambda: pre_delete.disconnect(receiver, sender=ModelFooReverse)
+    )
+    monkeypatch.setattr(
+        ModelFooReverse,
+        "_mutability_rules",
+        (
+            MutabilityRule(
+                "state",
+                values=(ModelState.MUTABLE_STATE,),
+                inst_exclusion_conditions=(lambda instance: True,),
+            ),
+        ),
+    )
+    child = ModelFooReverse.objects.create(
+        related_field=parent_instance, state=ModelState.IMMUTABLE_STATE
+    )
+    parent_instance.delete(validate_cascade=True)
+    assert not ModelFooReverse.objects.filter(pk=child.pk).exists()
+    assert BaseModel.objects.count() == 0
+    assert receiver.called
@@ -0,0 +1,107 @@
+from unittest import mock
+
+import pytest
+from django.db.models import Q
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelDepthFoo, ModelFooReverse
+from tximmutability.exceptions import OrMutableException, RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or, check_mutability
+
+STATE_RULE = MutabilityRule(
+    "state", values=(ModelState.MUTABLE_STATE,), exclude_on_delete=True
+)
+
+
+@pytest.fixture
+def records(monkeypatch):
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (STATE_RULE,))
+    mutable = BaseModel.objects.create(state=ModelState.MUTABLE_STATE)
+    immutable = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    return mutable, immutable
+
+
+@pytest.mark.django_db
+def test_check_mutability(records, django_assert_num_queries):
+    mutable, immutable = records
+    with django_assert_num_queries(1):
+        verdicts = check_mutability([mutable, immutable], ("update", "delete"))
+    assert verdicts[mutable.pk] == {"update": True, "delete": True}
+    assert verdicts[immutable.pk]["delete"] is True
+    (error,) = verdicts[immutable.pk]["update"]
+    assert isinstance(error, RuleMutableException)
+    assert error.params["instances"] == [immutable]
+
+
+@pytest.mark.django_db
+def test_check_mutability_fields(records):
+    mutable, immutable = records
+    verdicts = check_mutability([immutable], ("update",), fields=["state"])
+    assert verdicts == {immutable.pk: {"update": True}}
+
+
+@pytest.mark.django_db
+def test_check_mutability_conditions(records):
+    """
+    Test - instance methods conditions are checked in memory and <Q>
+    conditions in the query.
+    """
+    mutable, immutable = records
+    other = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE, name="tx")
+    for instance in (mutable, immutable, other):
+        instance._mutability_rules = (
+            MutabilityRule(
+                "state",
+                values=(ModelState.MUTABLE_STATE,),
+                inst_conditions=(BaseModel.condition_func,),
+            ),
+            MutabilityRule(
+                "state",
+                values=(ModelState.MUTABLE_STATE,),
+                inst_exclusion_conditions=(Q(name="tx"),),
+            ),
+        )
+    verdicts = check_mutability([mutable, immutable, other], ("delete",))
+    assert verdicts[mutable.pk]["delete"] is True
+    assert len(verdicts[immutable.pk]["delete"]) == 1
+    assert len(verdicts[other.pk]["delete"]) == 1
+
+
+@pytest.mark.django_db
+def test_check_mutability_or(records):
+    mutable, immutable = records
+    for instance in records:
+        instance._mutability_rules = (
+            Or(STATE_RULE, MutabilityRule("name", values=("python",))),
+        )
+    verdicts = check_mutability(records, ("update",))
+    assert verdicts[mutable.pk]["update"] is True
+    (error,) = verdicts[immutable.pk]["update"]
+    assert isinstance(error, OrMutableException)
+    assert len(error.error_list) == 2
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_check_mutability_python_rule(method_mock, records):
+    mutable, immutable = records
+    verdicts = check_mutability(records, ("update",))
+    assert verdicts[mutable.pk]["update"] is True
+    assert verdicts[immutable.pk]["update"] is not True
+
+
+def test_check_mutability_unsaved():
+    with pytest.raises(ValueError):
+        check_mutability([BaseModel()], ("update",))
+
+
+@pytest.mark.django_db
+def test_check_mutability_many_models():
+    """
+    Test - objects of different models may share a pk, they are rejected.
+    """
+    locked = ModelFooReverse.objects.create(state=ModelState.IMMUTABLE_STATE)
+    mutable = ModelDepthFoo.objects.create(pk=locked.pk)
+    with pytest.raises(ValueError):
+        check_mutability([locked, mutable], ("update",))
@@ -3,7 +3,8 @@ from unittest import mock
 import pytest
 from django.core.exceptions import ValidationError
 
-from tests.testapp.models import BaseModel, BaseMutabilityModel
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, BaseMutabilityModel, InvoiceQuerySet
 
 # CONDITIONS
 
@@ -310,3 +311,57 @@ def test__immutability_instance__multi_exclude_condition__one_met(
     assert not method_mock.called, 'a was called and should not have been'
     assert base_immutable_instance.name == BaseModel.ACCEPTED_VALUE_FUNC
     assert base_immutable_instance.surname == "fail"
+
+
+# SHARED conditions
+
+
+@pytest.mark.django_db
+def test__shared_condition__checked_once(base_mutable_instance):
+    """
+    Test - a condition listed by many rules is checked once in a validation
+    pass.
+    """
+    calls = []
+
+    def shared_condition(instance):
+        calls.append(instance)
+        return True
+
+    base_mutable_instance._mutability_rules = tuple(
+        BaseMutabilityModel.get_mutability_rule(
+            values=(ModelState.MUTABLE_STATE, str(index)),
+            inst_conditions=(shared_condition,),
+        )
+        for index in range(5)
+    )
+    base_mutable_instance.name = "changed"
+    base_mutable_instance.save()
+    assert calls == [base_mutable_instance]
+    base_mutable_instance.name = "changed again"
+    base_mutable_instance.save()
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test__shared_queryset_condition__checked_once(base_mutable_instance, monkeypatch):
+    """
+    Test - a queryset condition listed by many rules is checked once in a
+    validation pass.
+    """
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        tuple(
+            BaseMutabilityModel.get_mutability_rule(
+                values=(ModelState.MUTABLE_STATE, str(index)),
+                queryset_conditions=(BaseModel.objects.name_tx,),
+            )
+            for index in range(5)
+        ),
+    )
+    with mock.patch.object(
+        InvoiceQuerySet, "name_tx", autospec=True, return_value=True
+    ) as name_tx:
+        BaseModel.objects.filter(pk=base_mutable_instance.pk).update(name="tx")
+    assert name_tx.call_count == 1
@@ -0,0 +1,86 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelDepthFoo, ModelLazyTracked
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import BaseMutableModelDelete
+
+RULES = (
+    MutabilityRule("related_field__state", values=(ModelState.MUTABLE_STATE,)),
+    MutabilityRule("own_related_field__state", values=(ModelState.MUTABLE_STATE,)),
+)
+
+
+def _base_model_queries(context):
+    table = BaseModel._meta.db_table
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if f'FROM "{table}"' in query["sql"]
+    ]
+
+
+@pytest.fixture
+def deferred_records():
+    related = ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+    parent = BaseModel.objects.create(state=ModelState.MUTABLE_STATE)
+    for _ in range(3):
+        BaseModel.objects.create(related_field=related, own_related_field=parent)
+    return BaseModel.objects.filter(related_field=related).only("name")
+
+
+@pytest.mark.django_db
+def test_deferred_instances_load(deferred_records, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        instances = list(deferred_records)
+    assert instances[0].tracker.changed() == {}
+
+
+@pytest.mark.django_db
+def test_deferred_instance_validation(deferred_records):
+    instance = deferred_records.first()
+    with CaptureQueriesContext(connection) as context:
+        with pytest.raises(RuleMutableException):
+            BaseMutableModelDelete(instance).validate(RULES)
+    # Both relations loaded in one query.
+    assert len(_base_model_queries(context)) == 1
+    assert instance.tracker.changed() == {}
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_deferred_instances_validation(method_mock, deferred_records):
+    instances = list(deferred_records)
+    with CaptureQueriesContext(connection) as context:
+        errors = BaseMutableModelDelete(deferred_records).get_instances_errors(
+            RULES[:1], instances
+        )
+    assert set(errors) == {instance.pk for instance in instances}
+    assert len(_base_model_queries(context)) == 1
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_deferred_queryset_validation(method_mock, deferred_records):
+    for queryset in (deferred_records, BaseModel.objects.defer("related_field")):
+        with CaptureQueriesContext(connection) as context:
+            with pytest.raises(RuleMutableException):
+                BaseMutableModelDelete(queryset).validate(RULES[:1])
+        # The relation is read by the rows query.
+        assert len(_base_model_queries(context)) == 1
+
+
+@pytest.mark.django_db
+def test_lazy_tracker_deferred_fields(django_assert_num_queries):
+    instance = ModelLazyTracked.objects.create()
+    instance = ModelLazyTracked.objects.only("state").get(pk=instance.pk)
+    with django_assert_num_queries(0):
+        instance.name = "changed"
+        instance.notes = "changed"
+    with django_assert_num_queries(1):
+        assert instance.tracker.changed() == {"name": "Lazy", "notes": ""}
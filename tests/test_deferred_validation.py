@@ -0,0 +1,138 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelRuleFieldsTracked
+from tximmutability.deferred import deferred_validation
+from tximmutability.exceptions import OrMutableException, RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or
+
+STATE_RULE = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+
+
+@pytest.fixture
+def state_rule(monkeypatch):
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (STATE_RULE,))
+
+
+def _selects(context):
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+    ]
+
+
+@pytest.mark.django_db
+def test_deferred_validation_one_query(state_rule):
+    instances = [
+        BaseModel.objects.create(state=ModelState.MUTABLE_STATE) for _ in range(5)
+    ]
+    with CaptureQueriesContext(connection) as context:
+        with deferred_validation():
+            for instance in instances:
+                instance.name = "changed"
+                instance.save()
+            assert not _selects(context)
+    assert len(_selects(context)) == 1
+    assert BaseModel.objects.filter(name="changed").count() == 5
+
+
+@pytest.mark.django_db
+def test_deferred_validation_rollback(state_rule):
+    mutable = BaseModel.objects.create(state=ModelState.MUTABLE_STATE)
+    immutable = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    with pytest.raises(RuleMutableException) as exc:
+        with deferred_validation():
+            for instance in (mutable, immutable):
+                instance.name = "changed"
+                instance.save()
+    assert exc.value.params["instances"] == [immutable]
+    assert not BaseModel.objects.filter(name="changed").exists()
+
+
+@pytest.mark.django_db
+def test_deferred_validation_state_before_block(state_rule):
+    """
+    Rows are checked as they were before the block.
+    """
+    mutable = BaseModel.objects.create(state=ModelState.MUTABLE_STATE)
+    with deferred_validation():
+        # Locked and changed in the same block.
+        mutable.state = ModelState.IMMUTABLE_STATE
+        mutable.name = "changed"
+        mutable.save()
+        mutable.surname = "changed"
+        mutable.save()
+    immutable = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    with pytest.raises(RuleMutableException):
+        with deferred_validation():
+            immutable.state = ModelState.MUTABLE_STATE
+            immutable.save()
+            immutable.name = "changed"
+            immutable.save()
+    immutable.refresh_from_db()
+    assert immutable.state == ModelState.IMMUTABLE_STATE
+    # Only the rule field.
+    with deferred_validation():
+        immutable.state = ModelState.MUTABLE_STATE
+        immutable.save()
+
+
+@pytest.mark.django_db
+def test_deferred_validation_nested_and_deleted(state_rule):
+    immutable = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    with pytest.raises(RuleMutableException):
+        with deferred_validation():
+            with deferred_validation():
+                immutable.name = "changed"
+                immutable.save()
+            # Validated by the outermost block.
+            assert BaseModel.objects.filter(name="changed").exists()
+    with deferred_validation():
+        immutable.name = "changed"
+        immutable.save()
+        immutable.delete(force_mutability=True)
+
+
+@pytest.mark.django_db
+def test_deferred_validation_or(monkeypatch):
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        (Or(STATE_RULE, MutabilityRule("surname", values=("unlocked",))),),
+    )
+    unlocked = BaseModel.objects.create(
+        state=ModelState.IMMUTABLE_STATE, surname="unlocked"
+    )
+    immutable = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    with deferred_validation():
+        unlocked.name = "changed"
+        unlocked.save()
+    with pytest.raises(OrMutableException):
+        with deferred_validation():
+            immutable.name = "changed"
+            immutable.save()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("update_fields", [None, ["name", "state"]])
+def test_deferred_validation_untracked_field_rule(update_fields):
+    """
+    Test - a field_rule not tracked (trackable_fields = RULE_FIELDS) is
+    checked with its saved value before the block.
+    """
+    instance = ModelRuleFieldsTracked.objects.create(state=ModelState.MUTABLE_STATE)
+    with deferred_validation():
+        # Locked by its own write in the block.
+        instance.name = "changed"
+        instance.state = ModelState.IMMUTABLE_STATE
+        instance.save(update_fields=update_fields)
+    saved = ModelRuleFieldsTracked.objects.get(pk=instance.pk)
+    assert (saved.name, saved.state) == ("changed", ModelState.IMMUTABLE_STATE)
+    with pytest.raises(RuleMutableException):
+        with deferred_validation():
+            saved.name = "again"
+            saved.save(update_fields=update_fields)
@@ -0,0 +1,88 @@
+import pytest
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or
+
+STATE_RULE = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+
+
+@pytest.mark.django_db
+def test_explain_queryset_update(monkeypatch):
+    python_rule = MutabilityRule("missing", values=(ModelState.MUTABLE_STATE,))
+    excluded_rule = MutabilityRule(
+        "state", values=(ModelState.MUTABLE_STATE,), exclude_on_update=True
+    )
+    conditioned_rule = MutabilityRule(
+        "state",
+        values=(ModelState.MUTABLE_STATE,),
+        queryset_conditions=(BaseModel.objects.name_tx,),
+    )
+    rules = (STATE_RULE, python_rule, excluded_rule, conditioned_rule)
+    monkeypatch.setattr(BaseModel, "_mutability_rules", rules)
+    BaseModel.objects.create(name="python")
+
+    plans = BaseModel.objects.filter(name="python").explain_mutability(
+        "update", fields=["surname"]
+    )
+
+    assert [plan["rule"] for plan in plans] == list(rules)
+    assert [(plan["status"], plan["reason"], plan["mode"]) for plan in plans] == [
+        ("applied", None, "sql"),
+        ("applied", None, "python"),
+        ("skipped", "exclude_on_update", "memory"),
+        ("skipped", "queryset_conditions", "memory"),
+    ]
+    assert '"state" IN' in plans[0]["sql"]
+    assert plans[1]["sql"].startswith("SELECT")
+    assert plans[2]["sql"] is None
+
+
+@pytest.mark.django_db
+def test_explain_queryset_update_excluded_fields(monkeypatch):
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (STATE_RULE,))
+    (plan,) = BaseModel.objects.all().explain_mutability("update", fields=["state"])
+    assert (plan["status"], plan["reason"]) == ("skipped", "exclude_fields")
+
+
+@pytest.mark.django_db
+def test_explain_instance(base_immutable_instance):
+    conditioned_rule = MutabilityRule(
+        "state",
+        values=(ModelState.MUTABLE_STATE,),
+        inst_conditions=(BaseModel.condition_func,),
+    )
+    base_immutable_instance._mutability_rules = (
+        Or(STATE_RULE, conditioned_rule),
+        MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    base_immutable_instance.name = "changed"
+
+    or_plan, plan = base_immutable_instance.explain_mutability("update")
+
+    assert or_plan["mode"] == "python"
+    assert [(branch["status"], branch["reason"]) for branch in or_plan["rules"]] == [
+        ("applied", None),
+        ("skipped", "inst_conditions"),
+    ]
+    assert (plan["mode"], plan["sql"]) == ("python", None)
+    (plan,) = base_immutable_instance.explain_mutability("delete")[1:]
+    assert plan["status"] == "applied"
+    plans = base_immutable_instance.explain_mutability("create")
+    assert {plan["reason"] for plan in plans[1:]} == {"exclude_on_create"}
+
+
+@pytest.mark.django_db
+def test_explain_guarded_save(base_immutable_instance):
+    base_immutable_instance._mutability_rules = (STATE_RULE,)
+    base_immutable_instance.guarded_save = True
+    base_immutable_instance.name = "changed"
+    (plan,) = base_immutable_instance.explain_mutability("update")
+    assert plan["mode"] == "sql"
+    assert '"state" IN' in plan["sql"]
+
+
+def test_explain_unknown_action():
+    with pytest.raises(ValueError):
+        BaseModel().explain_mutability("archive")
@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelAttachment, ModelDepthFoo
+from tximmutability.rule import MutabilityRule
+
+RULE = MutabilityRule("content_object__state", values=(ModelState.MUTABLE_STATE,))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "parent_state, expected",
+    [(ModelState.IMMUTABLE_STATE, False), (ModelState.MUTABLE_STATE, True)],
+)
+def test_generic_foreign_key_instance(parent_state, expected):
+    """
+    Test - an instance is mutable if the object of its GenericForeignKey is
+    mutable.
+    """
+    parent = ModelDepthFoo.objects.create(state=parent_state)
+    attachment = ModelAttachment.objects.create(content_object=parent)
+    attachment.name = "changed"
+    if expected:
+        attachment.save()
+    else:
+        with pytest.raises(ValidationError):
+            attachment.save()
+
+
+@pytest.mark.django_db
+def test_generic_foreign_key_unset_or_missing():
+    """
+    Test - an unset GenericForeignKey, or one whose object was deleted, is
+    mutable.
+    """
+    parent = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    missing = ModelAttachment.objects.create(content_object=parent)
+    BaseModel.objects.filter(pk=parent.pk).delete()
+    ModelAttachment.objects.create()
+    is_mutable, failed_instances = RULE.is_mutable(
+        ModelAttachment.objects.all(), "update"
+    )
+    assert is_mutable
+    missing = ModelAttachment.objects.get(pk=missing.pk)
+    assert RULE.is_mutable(missing, "update")[0]
+
+
+@pytest.mark.django_db
+def test_generic_foreign_key_queryset_query_by_content_type(
+    django_assert_num_queries,
+):
+    """
+    Test - the objects of the GenericForeignKey of a queryset are loaded
+    with one query by content type.
+    """
+    locked = []
+    for x in range(3):
+        depth_parent = ModelDepthFoo.objects.create(state=ModelState.MUTABLE_STATE)
+        ModelAttachment.objects.create(content_object=depth_parent)
+        base_parent = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+        locked.append(ModelAttachment.objects.create(content_object=base_parent))
+        # Attachments sharing a parent.
+        locked.append(ModelAttachment.objects.create(content_object=base_parent))
+    # Rows + one query by content type.
+    with django_assert_num_queries(3):
+        is_mutable, failed_instances = RULE.is_mutable(
+            ModelAttachment.objects.all(), "update"
+        )
+    assert not is_mutable
+    assert failed_instances == locked
+
+
+@pytest.mark.django_db
+def test_generic_foreign_key_failed_instances(django_assert_num_queries):
+    """
+    Test - instances validated together load the objects of their
+    GenericForeignKey with one query by content type.
+    """
+    locked_parent = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    mutable_parent = ModelDepthFoo.objects.create(state=ModelState.MUTABLE_STATE)
+    locked = ModelAttachment.objects.create(content_object=locked_parent)
+    instances = [
+        locked,
+        ModelAttachment.objects.create(content_object=mutable_parent),
+        ModelAttachment.objects.create(content_object=mutable_parent),
+    ]
+    with django_assert_num_queries(2):
+        assert RULE.get_failed_instances(instances) == [locked]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compiled", [True, False])
+def test_generic_relation(compiled):
+    """
+    Test - a GenericRelation is mutable if every related object is mutable,
+    checked in SQL (NOT EXISTS) or in Python.
+    """
+    rule = MutabilityRule("attachments__state", values=(ModelState.MUTABLE_STATE,))
+    assert rule.get_mutable_q(ModelDepthFoo) is not None
+    locked = ModelDepthFoo.objects.create()
+    ModelAttachment.objects.create(
+        content_object=locked, state=ModelState.MUTABLE_STATE
+    )
+    ModelAttachment.objects.create(
+        content_object=locked, state=ModelState.IMMUTABLE_STATE
+    )
+    unlocked = ModelDepthFoo.objects.create()
+    ModelAttachment.objects.create(
+        content_object=unlocked, state=ModelState.MUTABLE_STATE
+    )
+    # Attachment of another model with the same object id.
+    ModelAttachment.objects.create(
+        content_object=BaseModel.objects.create(pk=unlocked.pk),
+        state=ModelState.IMMUTABLE_STATE,
+    )
+    ModelDepthFoo.objects.create()
+    queryset = ModelDepthFoo.objects.order_by('pk')
+    if compiled:
+        is_mutable, failed_instances = rule.is_mutable(queryset, "update")
+    else:
+        with mock.patch(
+            "tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None
+        ):
+            is_mutable, failed_instances = rule.is_mutable(queryset, "update")
+    assert failed_instances == [locked]
@@ -0,0 +1,162 @@
+from unittest import mock
+
+import pytest
+from django.db.models import Q, QuerySet
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import (
+    BaseModel,
+    BaseMutabilityModel,
+    ModelDepthFoo,
+    ModelDepthFooChild,
+    ModelFooReverse,
+)
+from tximmutability.exceptions import OrMutableException, RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or
+
+
+@pytest.mark.django_db
+def test_guarded_save_mutable_instance(
+    base_mutable_instance, django_assert_num_queries
+):
+    """
+    Test - guarded save of a mutable instance runs only the UPDATE statement.
+    """
+    base_mutable_instance._mutability_rules = (
+        MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    base_mutable_instance.name = "tx"
+    with django_assert_num_queries(1):
+        base_mutable_instance.save(guarded_save=True)
+    base_mutable_instance.refresh_from_db()
+    assert base_mutable_instance.name == "tx"
+
+
+@pytest.mark.django_db
+def test_guarded_save_immutable_instance(base_immutable_instance):
+    """
+    Test - guarded save of an immutable instance does not update the row and
+    raises the rule error.
+    """
+    error_code = "0001"
+    base_immutable_instance._mutability_rules = (
+        MutabilityRule(
+            "state", values=(ModelState.MUTABLE_STATE,), error_code=error_code
+        ),
+    )
+    base_immutable_instance.name = "tx"
+    with pytest.raises(RuleMutableException) as excinfo:
+        base_immutable_instance.save(guarded_save=True)
+    assert excinfo.value.code == error_code
+    assert base_immutable_instance.tracker.has_changed("name")
+    base_immutable_instance.refresh_from_db()
+    assert base_immutable_instance.name == BaseMutabilityModel.DEFAULT_NAME
+    assert BaseModel.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_guarded_save_row_locked_after_load(base_mutable_instance):
+    """
+    Test - the row is locked after the instance was loaded, guarded save uses
+    the state of the row at the time of the UPDATE.
+    """
+    base_mutable_instance._mutability_rules = (
+        MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    BaseModel.objects.filter(pk=base_mutable_instance.pk).update(
+        force_mutability=True, state=ModelState.IMMUTABLE_STATE
+    )
+    base_mutable_instance.name = "tx"
+    with pytest.raises(RuleMutableException):
+        base_mutable_instance.save(guarded_save=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name, state, expectation",
+    [
+        ("tx", ModelState.IMMUTABLE_STATE, pytest.raises(OrMutableException)),
+        ("python", ModelState.IMMUTABLE_STATE, None),
+        ("tx", ModelState.MUTABLE_STATE, None),
+    ],
+)
+def test_guarded_save_or_operator(
+    make_immutable_instance_record, name, state, expectation
+):
+    """
+    Test - Or operator and Q conditions are part of the guarded UPDATE.
+    """
+    instance = make_immutable_instance_record(name=name, state=state)
+    instance._mutability_rules = (
+        Or(
+            MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),
+            MutabilityRule(
+                "state",
+                values=(ModelState.MUTABLE_STATE,),
+                inst_exclusion_conditions=(Q(name="python"),),
+            ),
+        ),
+    )
+    instance.surname = "foo"
+    if expectation:
+        with expectation:
+            instance.save(guarded_save=True)
+    else:
+        instance.save(guarded_save=True)
+        instance.refresh_from_db()
+        assert instance.surname == "foo"
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_guarded_save_python_rule(method_mock, base_mutable_instance):
+    """
+    Test - rules that can not be expressed as SQL are checked before the save.
+    """
+    base_mutable_instance._mutability_rules = (
+        MutabilityRule("modelfooreverse__state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    ModelFooReverse.objects.create(
+        related_field=base_mutable_instance, state=ModelState.IMMUTABLE_STATE
+    )
+    base_mutable_instance.name = "tx"
+    with pytest.raises(RuleMutableException):
+        base_mutable_instance.save(guarded_save=True)
+
+
+@pytest.mark.django_db
+def test_guarded_save_parent_table_rolled_back():
+    """
+    Test - with multi-table inheritance the parent tables written before the
+    guarded UPDATE are rolled back if it does not match the row.
+    """
+    instance = ModelDepthFooChild.objects.create(state=ModelState.MUTABLE_STATE)
+    # Locked by another process after the instance was loaded.
+    QuerySet.update(
+        ModelDepthFoo.objects.filter(pk=instance.pk),
+        state=ModelState.IMMUTABLE_STATE,
+    )
+    instance.name = "changed"
+    instance.notes = "changed"
+    with pytest.raises(RuleMutableException):
+        instance.save()
+    saved = ModelDepthFooChild.objects.get(pk=instance.pk)
+    assert saved.name != "changed"
+    assert saved.notes != "changed"
+    # The transaction can go on.
+    assert ModelDepthFoo.objects.filter(pk=instance.pk).exists()
+
+
+@pytest.mark.django_db
+def test_guarded_save_parent_table_mutable():
+    """
+    Test - guarded save of a mutable instance with multi-table inheritance
+    writes every table.
+    """
+    instance = ModelDepthFooChild.objects.create(state=ModelState.MUTABLE_STATE)
+    instance.name = "changed"
+    instance.notes = "changed"
+    instance.save()
+    saved = ModelDepthFooChild.objects.get(pk=instance.pk)
+    assert (saved.name, saved.notes) == ("changed", "changed")
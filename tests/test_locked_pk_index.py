@@ -0,0 +1,166 @@
+import pytest
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel
+from tximmutability import index as locked_pk_index
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.index import PkSet, get_filtered_pks, get_locked_pk_index
+from tximmutability.rule import MutabilityRule
+
+RULES = (MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),)
+
+
+@pytest.fixture
+def indexed_model(monkeypatch):
+    monkeypatch.setattr(locked_pk_index, "_indexes", {})
+    monkeypatch.setattr(BaseModel, "_mutability_rules", RULES)
+    monkeypatch.setattr(BaseModel, "locked_pk_index", True)
+    return BaseModel
+
+
+@pytest.fixture
+def records(indexed_model):
+    mutable = [
+        indexed_model.objects.create(state=ModelState.MUTABLE_STATE) for _ in range(3)
+    ]
+    locked = indexed_model.objects.create(state=ModelState.IMMUTABLE_STATE)
+    return mutable, locked
+
+
+def test_pk_set():
+    pks = PkSet([5, 1, 3, 3])
+    assert list(pks) == [1, 3, 5]
+    pks.add(4)
+    pks.discard(1)
+    pks.discard(2)
+    assert list(pks) == [3, 4, 5]
+    assert 4 in pks and 1 not in pks
+    assert pks.intersection([1, 4, 5, 6]) == {4, 5}
+
+
+@pytest.mark.django_db
+def test_get_filtered_pks():
+    assert get_filtered_pks(BaseModel.objects.filter(pk__in=[1, 2])) == [1, 2]
+    assert get_filtered_pks(BaseModel.objects.filter(pk=3)) == [3]
+    assert get_filtered_pks(BaseModel.objects.filter(name="tx")) is None
+    assert get_filtered_pks(BaseModel.objects.filter(pk__in=[1], name="tx")) is None
+    assert get_filtered_pks(BaseModel.objects.all()) is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_update_by_pks_checked_in_memory(records):
+    mutable, locked = records
+    pks = [instance.pk for instance in mutable]
+    # Index loaded on first use.
+    BaseModel.objects.filter(pk__in=pks).update(name="first")
+    with CaptureQueriesContext(connection) as queries:
+        assert BaseModel.objects.filter(pk__in=pks).update(name="second") == 3
+    assert len(queries) == 1
+    with pytest.raises(RuleMutableException):
+        BaseModel.objects.filter(pk__in=pks + [locked.pk]).update(name="third")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_update_checked_in_memory(records):
+    mutable, locked = records
+    BaseModel.objects.filter(pk__in=[mutable[0].pk]).update(name="first")
+    for instance in mutable:
+        instance.name = "bulk"
+    with CaptureQueriesContext(connection) as queries:
+        BaseModel.objects.bulk_update(mutable, ["name"])
+    assert not any("SELECT" in query["sql"] for query in queries)
+    locked.name = "bulk"
+    with pytest.raises(RuleMutableException):
+        BaseModel.objects.bulk_update(mutable + [locked], ["name"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_index_kept_current_on_save(records):
+    mutable, _ = records
+    instance = mutable[0]
+    queryset = BaseModel.objects.filter(pk__in=[instance.pk])
+    queryset.update(name="first")
+    instance.state = ModelState.IMMUTABLE_STATE
+    instance.save()
+    with pytest.raises(RuleMutableException):
+        queryset.update(name="second")
+    instance.state = ModelState.MUTABLE_STATE
+    instance.save(force_mutability=True)
+    assert queryset.update(name="third") == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_index_kept_current_on_queryset_update(records):
+    mutable, _ = records
+    queryset = BaseModel.objects.filter(pk__in=[mutable[0].pk])
+    queryset.update(name="first")
+    BaseModel.objects.filter(name="first").update(state=ModelState.IMMUTABLE_STATE)
+    with pytest.raises(RuleMutableException):
+        queryset.update(name="second")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delete_checked_in_memory(records):
+    mutable, locked = records
+    BaseModel.objects.filter(pk__in=[mutable[0].pk]).update(name="first")
+    with CaptureQueriesContext(connection) as queries:
+        mutable[1].delete()
+    # Only the cascade is collected, the rule is not checked at DB.
+    assert not any('"state"' in query["sql"] for query in queries)
+    with pytest.raises(RuleMutableException):
+        locked.delete()
+
+
+@pytest.mark.django_db
+def test_written_in_transaction_checked_at_db(records):
+    """
+    Test - rows written in the current transaction are checked at DB, the
+    transaction may be rolled back.
+    """
+    mutable, _ = records
+    instance = mutable[0]
+    queryset = BaseModel.objects.filter(pk__in=[instance.pk])
+    queryset.update(name="first")
+    BaseModel.objects.filter(pk=instance.pk).update(
+        force_mutability=True, state=ModelState.IMMUTABLE_STATE
+    )
+    with pytest.raises(RuleMutableException):
+        queryset.update(name="second")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_verify(records):
+    mutable, locked = records
+    index = get_locked_pk_index(BaseModel)
+    BaseModel.objects.filter(pk__in=[mutable[0].pk]).update(name="first")
+    assert index.verify() == {}
+    # Written without the hooks of the library.
+    QuerySet.update(
+        BaseModel.objects.filter(pk=mutable[1].pk), state=ModelState.IMMUTABLE_STATE
+    )
+    assert index.verify() == {RULES[0]: ({mutable[1].pk}, set())}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_not_loaded_in_transaction(records):
+    """
+    Test - the index is not loaded inside a transaction, its uncommitted
+    writes would be kept after a rollback.
+    """
+    _, locked = records
+    queryset = BaseModel.objects.filter(pk__in=[locked.pk])
+    # Rows created by the fixture are checked, nothing is loaded yet.
+    get_locked_pk_index(BaseModel).allows(None, (), [])
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            BaseModel.objects.filter(pk=locked.pk).update(
+                force_mutability=True, state=ModelState.MUTABLE_STATE
+            )
+            queryset.update(name="first")
+            raise RuntimeError("rollback")
+    with pytest.raises(RuleMutableException):
+        queryset.update(name="second")
+    assert BaseModel.objects.get(pk=locked.pk).name != "second"
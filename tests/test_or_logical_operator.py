@@ -1,10 +1,13 @@
+from unittest import mock
+
 import pytest
 from django.core.exceptions import ValidationError
 
 from tests.testapp.constants import ModelState
 from tests.testapp.models import BaseModel, BaseMutabilityModel
+from tximmutability.exceptions import OrMutableException
 from tximmutability.rule import MutabilityRule
-from tximmutability.services import Or
+from tximmutability.services import Or, check_mutability
 
 
 @pytest.mark.django_db
@@ -115,3 +118,30 @@ def test__or_operator_with_external_rule__fail_or_operator(foo_instance):
     foo_instance.refresh_from_db()
     assert foo_instance.name == BaseMutabilityModel.DEFAULT_NAME
     assert foo_instance.surname == BaseMutabilityModel.DEFAULT_SURNAME
+
+
+@pytest.mark.django_db
+def test__or_operator__errors_built_on_failure(base_immutable_instance):
+    """
+    Errors of the rules of an Or are only built if the Or is not met.
+    """
+    failing_rule = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+    passing_rule = MutabilityRule("state", values=(ModelState.IMMUTABLE_STATE,))
+    base_immutable_instance._mutability_rules = (Or(failing_rule, passing_rule),)
+    base_immutable_instance.name = "changed"
+    with mock.patch.object(
+        MutabilityRule, "get_error", autospec=True
+    ) as get_error_mock:
+        base_immutable_instance.save()
+        check_mutability([base_immutable_instance], ("update",))
+    assert not get_error_mock.called
+
+    base_immutable_instance._mutability_rules = (Or(failing_rule, failing_rule),)
+    base_immutable_instance.name = "changed again"
+    with pytest.raises(OrMutableException) as exc:
+        base_immutable_instance.save()
+    assert len(exc.value.error_list) == 2
+    (errors,) = check_mutability([base_immutable_instance], ("update",))[
+        base_immutable_instance.pk
+    ]["update"]
+    assert len(errors.error_list) == 2
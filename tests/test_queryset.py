@@ -1,11 +1,14 @@
 from contextlib import nullcontext as does_not_raise
+from unittest import mock
 
 import pytest
+from django.db.models import Q
 
 from tests.testapp.constants import ModelState
-from tests.testapp.models import BaseModel, ModelDepthFoo
+from tests.testapp.models import BaseModel, ModelDepthFoo, ModelFooReverse
 from tximmutability.exceptions import RuleMutableException
 from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or
 
 
 @pytest.mark.django_db
@@ -142,3 +145,243 @@ def test_update_queryset_exclude_fields_fk(make_immutable_instance_record):
     queryset = BaseModel.objects.all()
     with does_not_raise():
         queryset.update(related_field=related_field)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "names, expectation",
+    [
+        (("tx", "_"), pytest.raises(RuleMutableException)),
+        (("_", "_"), does_not_raise()),
+    ],
+)
+def test_queryset_row_inst_conditions(
+    make_immutable_instance_record, names, expectation
+):
+    """
+    This test check that `Q` inst_conditions are applied row by row on queryset update.
+    Only rows matching the condition (name="tx") are checked by the rule.
+    """
+    BaseModel._mutability_rules = (
+        MutabilityRule(
+            field_rule="state",
+            values=(ModelState.MUTABLE_STATE,),
+            inst_conditions=(Q(name="tx"),),
+        ),
+    )
+    for name in names:
+        make_immutable_instance_record(name=name)
+    queryset = BaseModel.objects.all()
+    with expectation:
+        queryset.update(surname="foo")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "names, expectation",
+    [
+        (("tx", "_"), pytest.raises(RuleMutableException)),
+        (("tx", "tx"), does_not_raise()),
+    ],
+)
+def test_queryset_row_inst_exclusion_conditions(
+    make_immutable_instance_record, names, expectation
+):
+    """
+    This test check that `Q` inst_exclusion_conditions exclude rows from the rule on queryset update.
+    """
+    BaseModel._mutability_rules = (
+        MutabilityRule(
+            field_rule="state",
+            values=(ModelState.MUTABLE_STATE,),
+            inst_exclusion_conditions=(Q(name="tx"),),
+        ),
+    )
+    for name in names:
+        make_immutable_instance_record(name=name)
+    queryset = BaseModel.objects.all()
+    with expectation:
+        queryset.update(surname="foo")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name, expectation",
+    [("tx", pytest.raises(RuleMutableException)), ("_", does_not_raise())],
+)
+def test_row_inst_conditions_on_single_instance(
+    make_immutable_instance_record, name, expectation
+):
+    """
+    This test check that `Q` inst_conditions are checked against the saved row on instance save.
+    """
+    instance = make_immutable_instance_record(name=name)
+    instance._mutability_rules = (
+        MutabilityRule(
+            field_rule="state",
+            values=(ModelState.MUTABLE_STATE,),
+            inst_conditions=(Q(name="tx"),),
+        ),
+    )
+    instance.surname = "foo"
+    with expectation:
+        instance.save()
+
+
+@pytest.mark.django_db
+def test_queryset_related_field_rule_failed_instances(make_immutable_instance_record):
+    """
+    This test check that a forward relation rule only reports the rows in immutable state.
+    """
+    rule = MutabilityRule(
+        field_rule="related_field__state", values=(ModelState.MUTABLE_STATE,)
+    )
+    locked = make_immutable_instance_record(
+        related_field=ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+    )
+    make_immutable_instance_record(
+        related_field=ModelDepthFoo.objects.create(state=ModelState.MUTABLE_STATE)
+    )
+    make_immutable_instance_record(related_field=None)
+
+    is_mutable, failed_instances = rule.is_mutable(BaseModel.objects.all(), "update")
+    assert not is_mutable
+    assert failed_instances == [locked]
+
+
+@pytest.fixture
+def mixed_state_records(make_immutable_instance_record):
+    mutable = [
+        make_immutable_instance_record(state=ModelState.MUTABLE_STATE) for x in range(3)
+    ]
+    immutable = [make_immutable_instance_record(name="tx") for x in range(2)]
+    return mutable, immutable
+
+
+@pytest.mark.django_db
+def test_update_mutable_only(mixed_state_records, django_assert_num_queries):
+    """
+    This test check that `update_mutable_only` updates the mutable rows and reports the skipped ones
+    with one query to find the skipped rows and one UPDATE.
+    """
+    BaseModel._mutability_rules = (
+        MutabilityRule(field_rule="state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    mutable, immutable = mixed_state_records
+    with django_assert_num_queries(2):
+        updated, skipped_pks = BaseModel.objects.all().update_mutable_only(
+            surname="foo"
+        )
+    assert updated == len(mutable)
+    assert sorted(skipped_pks) == sorted(x.pk for x in immutable)
+    assert set(
+        BaseModel.objects.filter(surname="foo").values_list("pk", flat=True)
+    ) == {x.pk for x in mutable}
+
+
+@pytest.mark.django_db
+def test_update_mutable_only_excluded_field(mixed_state_records):
+    """
+    This test check that `update_mutable_only` does not skip rows when only excluded fields are updated.
+    """
+    BaseModel._mutability_rules = (
+        MutabilityRule(
+            field_rule="state",
+            exclude_fields=("description",),
+            values=(ModelState.MUTABLE_STATE,),
+        ),
+    )
+    updated, skipped_pks = BaseModel.objects.all().update_mutable_only(
+        description="foo"
+    )
+    assert updated == 5
+    assert skipped_pks == []
+
+
+@pytest.mark.django_db
+def test_update_mutable_only_or_operator(mixed_state_records):
+    """
+    This test check that `update_mutable_only` allows the rows that met any of the `Or` rules.
+    """
+    BaseModel._mutability_rules = (
+        Or(
+            MutabilityRule(field_rule="state", values=(ModelState.MUTABLE_STATE,)),
+            MutabilityRule(field_rule="name", values=("tx",)),
+        ),
+    )
+    updated, skipped_pks = BaseModel.objects.all().update_mutable_only(surname="foo")
+    assert updated == 5
+    assert skipped_pks == []
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_update_mutable_only_python_rule(method_mock, mixed_state_records):
+    """
+    This test check that `update_mutable_only` skips the rows of rules that can not be expressed as SQL.
+    """
+    BaseModel._mutability_rules = (
+        MutabilityRule(
+            field_rule="modelfooreverse__state", values=(ModelState.MUTABLE_STATE,)
+        ),
+    )
+    mutable, immutable = mixed_state_records
+    ModelFooReverse.objects.create(
+        related_field=immutable[0], state=ModelState.IMMUTABLE_STATE
+    )
+    updated, skipped_pks = BaseModel.objects.all().update_mutable_only(surname="foo")
+    assert updated == 4
+    assert skipped_pks == [immutable[0].pk]
+
+
+@pytest.mark.django_db
+def test_with_mutability(mixed_state_records, django_assert_num_queries, monkeypatch):
+    """
+    This test check that `with_mutability` annotates the editability of every row in the same query.
+    """
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        (
+            MutabilityRule(
+                field_rule="state",
+                values=(ModelState.MUTABLE_STATE,),
+                exclude_on_delete=True,
+            ),
+        ),
+    )
+    mutable, immutable = mixed_state_records
+    with django_assert_num_queries(1):
+        rows = list(BaseModel.objects.with_mutability().order_by("pk"))
+    assert [row.mutable_update for row in rows] == [True] * 3 + [False] * 2
+    assert all(row.mutable_delete for row in rows)
+    (row,) = BaseModel.objects.with_mutability(
+        actions=("update",), fields=["state"]
+    ).filter(pk=immutable[0].pk)
+    assert row.mutable_update
+
+
+@pytest.mark.django_db
+def test_locked_and_mutable_filters(mixed_state_records, monkeypatch):
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        (MutabilityRule(field_rule="state", values=(ModelState.MUTABLE_STATE,)),),
+    )
+    mutable, immutable = mixed_state_records
+    assert set(BaseModel.objects.locked("update")) == set(immutable)
+    assert set(BaseModel.objects.mutable("delete")) == set(mutable)
+    assert not BaseModel.objects.locked("update", fields=["state"]).exists()
+    assert BaseModel.objects.mutable("update", fields=["state"]).count() == 5
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_with_mutability_python_rule(method_mock, monkeypatch):
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        (MutabilityRule(field_rule="state", values=(ModelState.MUTABLE_STATE,)),),
+    )
+    with pytest.raises(ValueError):
+        BaseModel.objects.with_mutability()
@@ -0,0 +1,89 @@
+import pytest
+from django.db import transaction
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelDepthFoo
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.rule import MutabilityRule
+
+ROUTERS = ["tximmutability.routers.ValidationReadRouter"]
+
+
+@pytest.fixture
+def replicated_instance(monkeypatch):
+    """
+    Instance immutable at the default database and mutable at the replica.
+    """
+    monkeypatch.setattr(
+        BaseModel,
+        "_mutability_rules",
+        (MutabilityRule("state", values=(ModelState.MUTABLE_STATE,)),),
+    )
+    instance = BaseModel.objects.create(state=ModelState.IMMUTABLE_STATE)
+    BaseModel.objects.using("replica").create(
+        pk=instance.pk, state=ModelState.MUTABLE_STATE
+    )
+    return instance
+
+
+@pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+def test_queryset_validation_reads_setting_database(settings, replicated_instance):
+    """
+    Test - validation of a queryset update reads from READ_DATABASE.
+    """
+    queryset = BaseModel.objects.filter(pk=replicated_instance.pk)
+    with pytest.raises(RuleMutableException):
+        queryset.update(surname="foo")
+    settings.TXIMMUTABILITY_READ_DATABASE = "replica"
+    assert queryset.update(surname="foo") == 1
+
+
+@pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+def test_queryset_validation_reads_per_call_database(replicated_instance):
+    """
+    Test - validation of a queryset update reads from the database passed on
+    the call.
+    """
+    queryset = BaseModel.objects.filter(pk=replicated_instance.pk)
+    assert queryset.update(validation_using="replica", surname="foo") == 1
+
+
+@pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+def test_validation_reads_writer_in_transaction(settings, replicated_instance):
+    """
+    Test - inside an active transaction the validation reads from the writer.
+    """
+    settings.TXIMMUTABILITY_READ_DATABASE = "replica"
+    queryset = BaseModel.objects.filter(pk=replicated_instance.pk)
+    with transaction.atomic():
+        with pytest.raises(RuleMutableException):
+            queryset.update(surname="foo")
+
+
+@pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+def test_instance_validation_reads_routed_database(settings, replicated_instance):
+    """
+    Test - saved_value and relations read from READ_DATABASE through the
+    router.
+    """
+    settings.DATABASE_ROUTERS = ROUTERS
+    settings.TXIMMUTABILITY_READ_DATABASE = "replica"
+    replicated_instance.surname = "foo"
+    replicated_instance.save()
+
+    related = ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+    ModelDepthFoo.objects.using("replica").create(
+        pk=related.pk, state=ModelState.MUTABLE_STATE
+    )
+    instance = BaseModel.objects.create(related_field=related)
+    instance._mutability_rules = (
+        MutabilityRule("related_field__state", values=(ModelState.MUTABLE_STATE,)),
+    )
+    instance.refresh_from_db()
+    instance.surname = "foo"
+    instance.save()
+
+    settings.TXIMMUTABILITY_READ_DATABASE = None
+    instance.surname = "bar"
+    with pytest.raises(RuleMutableException):
+        instance.save()
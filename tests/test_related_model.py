@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 
 from contextlib import nullcontext as does_not_raise
+from unittest import mock
 
 import pytest
 from django.core.exceptions import ValidationError
@@ -12,7 +13,9 @@ from tests.testapp.models import (
     BaseMutabilityModel,
     ModelDepthFoo,
     ModelFooReverse,
+    ModelTag,
 )
+from tximmutability.rule import MutabilityRule
 
 
 @pytest.mark.django_db
@@ -372,3 +375,181 @@ class TestMultiReverseRelation(MixinTest):
         self.update_field_when_model_is_immutable(
             immutable_instance, field_name, expectation
         )
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_parent_verdict_checked_once_per_validation(
+    method_mock, django_assert_max_num_queries
+):
+    """
+    Test - children sharing a parent check the parent relation once by
+    validation pass.
+    """
+    rule = MutabilityRule(
+        "own_related_field__modelfooreverse__state",
+        values=(ModelState.MUTABLE_STATE,),
+    )
+    for x in range(2):
+        parent = BaseModel.objects.create()
+        ModelFooReverse.objects.create(
+            related_field=parent, state=ModelState.MUTABLE_STATE
+        )
+        ModelFooReverse.objects.create(
+            related_field=parent, state=ModelState.MUTABLE_STATE
+        )
+        for y in range(5):
+            BaseModel.objects.create(own_related_field=parent)
+    queryset = BaseModel.objects.filter(own_related_field__isnull=False)
+    # 1 to load the queryset + by parent: load it, its children and their
+    # saved values.
+    with django_assert_max_num_queries(1 + 2 * 4):
+        is_mutable, failed_instances = rule.is_mutable(queryset, "update")
+    assert is_mutable
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "locked_state, expected",
+    [(ModelState.IMMUTABLE_STATE, False), (ModelState.MUTABLE_STATE, True)],
+)
+def test_reverse_relation_checked_in_one_query(
+    locked_state, expected, django_assert_num_queries
+):
+    """
+    Test - a reverse relation with many related objects is checked with a
+    single NOT EXISTS query.
+    """
+    rule = MutabilityRule("modelfooreverse__state", values=(ModelState.MUTABLE_STATE,))
+    instance = BaseModel.objects.create()
+    related = [
+        ModelFooReverse(related_field=instance, state=ModelState.MUTABLE_STATE)
+        for x in range(50)
+    ]
+    related.append(ModelFooReverse(related_field=instance, state=locked_state))
+    ModelFooReverse.objects.bulk_create(related)
+    with django_assert_num_queries(1):
+        is_mutable, failed_instances = rule.is_mutable(instance, "delete")
+    assert is_mutable is expected
+
+
+@pytest.mark.django_db
+def test_multi_reverse_relation_queryset_failed_instances():
+    """
+    Test - nested reverse relations of a queryset are checked in SQL.
+    """
+    rule = MutabilityRule(
+        "basemodel__modelfooreverse__state", values=(ModelState.MUTABLE_STATE,)
+    )
+    locked = BaseModel.objects.create()
+    ModelFooReverse.objects.create(
+        related_field=BaseModel.objects.create(own_related_field=locked),
+        state=ModelState.IMMUTABLE_STATE,
+    )
+    unlocked = BaseModel.objects.create()
+    ModelFooReverse.objects.create(
+        related_field=BaseModel.objects.create(own_related_field=unlocked),
+        state=ModelState.MUTABLE_STATE,
+    )
+    queryset = BaseModel.objects.filter(pk__in=[locked.pk, unlocked.pk])
+    is_mutable, failed_instances = rule.is_mutable(queryset, "delete")
+    assert failed_instances == [locked]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "locked_state, expected",
+    [(ModelState.IMMUTABLE_STATE, False), (ModelState.MUTABLE_STATE, True)],
+)
+def test_prefetched_reverse_relation_no_queries(
+    locked_state, expected, django_assert_num_queries
+):
+    """
+    Test - a prefetched reverse relation is checked in memory.
+    """
+    rule = MutabilityRule("modelfooreverse__state", values=(ModelState.MUTABLE_STATE,))
+    instance = BaseModel.objects.create()
+    ModelFooReverse.objects.create(
+        related_field=instance, state=ModelState.MUTABLE_STATE
+    )
+    ModelFooReverse.objects.create(related_field=instance, state=locked_state)
+    instance = BaseModel.objects.prefetch_related("modelfooreverse_set").get(
+        pk=instance.pk
+    )
+    with django_assert_num_queries(0):
+        is_mutable, failed_instances = rule.is_mutable(instance, "delete")
+    assert is_mutable is expected
+
+
+@pytest.mark.django_db
+def test_prefetched_reverse_relation_changed_in_memory():
+    """
+    Test - a prefetched object changed in memory is checked with its saved
+    value.
+    """
+    rule = MutabilityRule("modelfooreverse__state", values=(ModelState.MUTABLE_STATE,))
+    instance = BaseModel.objects.create()
+    ModelFooReverse.objects.create(
+        related_field=instance, state=ModelState.IMMUTABLE_STATE
+    )
+    instance = BaseModel.objects.prefetch_related("modelfooreverse_set").get(
+        pk=instance.pk
+    )
+    instance.modelfooreverse_set.all()[0].state = ModelState.MUTABLE_STATE
+    is_mutable, failed_instances = rule.is_mutable(instance, "delete")
+    assert not is_mutable
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("as_queryset", [False, True])
+@pytest.mark.parametrize(
+    "model, field_rule, related_model",
+    [
+        (ModelTag, "items__state", ModelDepthFoo),
+        (ModelDepthFoo, "tags__state", ModelTag),
+    ],
+)
+@pytest.mark.parametrize(
+    "locked_state, expected",
+    [(ModelState.IMMUTABLE_STATE, False), (ModelState.MUTABLE_STATE, True)],
+)
+def test_many_to_many_relation(
+    model, field_rule, related_model, locked_state, expected, as_queryset, compiled
+):
+    """
+    Test - forward and reverse many-to-many relations are checked in SQL and
+    with the Python fallback, for an instance and for a queryset.
+    """
+    rule = MutabilityRule(field_rule, values=(ModelState.MUTABLE_STATE,))
+    locked = model.objects.create(state=ModelState.MUTABLE_STATE)
+    unlocked = model.objects.create(state=ModelState.MUTABLE_STATE)
+    accessor = field_rule.split("__")[0]
+    getattr(locked, accessor).add(
+        related_model.objects.create(state=ModelState.MUTABLE_STATE),
+        related_model.objects.create(state=locked_state),
+    )
+    getattr(unlocked, accessor).add(
+        related_model.objects.create(state=ModelState.MUTABLE_STATE)
+    )
+    # an object with no related objects is mutable
+    empty = model.objects.create(state=ModelState.MUTABLE_STATE)
+    patch = (
+        does_not_raise()
+        if compiled
+        else mock.patch(
+            "tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None
+        )
+    )
+    with patch:
+        assert (rule.get_mutable_q(model) is not None) is compiled
+        if as_queryset:
+            queryset = model.objects.filter(
+                pk__in=[locked.pk, unlocked.pk, empty.pk]
+            ).order_by("pk")
+            is_mutable, failed_instances = rule.is_mutable(queryset, "update")
+            assert failed_instances == ([] if expected else [locked])
+        else:
+            is_mutable, failed_instances = rule.is_mutable(locked, "update")
+            assert rule.is_mutable(empty, "update")[0]
+    assert is_mutable is expected
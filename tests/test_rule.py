@@ -0,0 +1,118 @@
+import pickle
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel
+from tximmutability.exceptions import OrMutableException, RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import BaseMutableModelUpdate, Or
+
+
+def test_rule_is_immutable():
+    rule = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+    with pytest.raises(AttributeError):
+        rule.field_rule = "name"
+    with pytest.raises(AttributeError):
+        rule.failed_instances = []
+    with pytest.raises(AttributeError):
+        Or(rule).rules_or_conditions = ()
+    assert not hasattr(rule, '__dict__')
+
+
+def test_rule_values_frozenset():
+    rule = MutabilityRule("state", values=("a", "b", "a"))
+    assert rule.values == frozenset({"a", "b"})
+    assert rule.has_value("b")
+    assert not rule.has_value("c")
+    # Unhashable values do not break the membership check.
+    assert not rule.has_value(["a"])
+
+
+def test_rule_values_shared():
+    rule = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+    same_values = MutabilityRule("name", values=(ModelState.MUTABLE_STATE,))
+    assert same_values.values is rule.values
+    assert same_values._ordered_values is rule._ordered_values
+    assert pickle.loads(pickle.dumps(rule)).values is rule.values
+    assert MutabilityRule("state", values=(True,)).values is not (
+        MutabilityRule("state", values=(1,)).values
+    )
+
+
+def test_rule_unhashable_values():
+    rule = MutabilityRule("data", values=(["a"], {"k": 1}))
+    assert rule.has_value(["a"])
+    assert rule.has_value({"k": 1})
+    assert not rule.has_value(["b"])
+    assert rule == MutabilityRule("data", values=(["a"], {"k": 1}))
+    assert hash(rule) == hash(MutabilityRule("data", values=(["a"], {"k": 1})))
+    assert rule != MutabilityRule("data", values=(["b"],))
+    assert rule.fingerprint == (
+        MutabilityRule("data", values=(["a"], {"k": 1})).fingerprint
+    )
+
+
+def test_rule_equality_and_hash():
+    rule = MutabilityRule(
+        "state",
+        values=("a", "b"),
+        exclude_fields=["description"],
+        inst_conditions=[BaseModel.condition_func],
+    )
+    same_rule = MutabilityRule(
+        "state",
+        values=("b", "a"),
+        exclude_fields=("description",),
+        inst_conditions=(BaseModel.condition_func,),
+    )
+    other_rule = MutabilityRule("state", values=("a",))
+    assert rule == same_rule
+    assert hash(rule) == hash(same_rule)
+    assert rule != other_rule
+    assert len({rule, same_rule, other_rule}) == 2
+    assert Or(rule, other_rule) == Or(same_rule, other_rule)
+    assert hash(Or(rule, other_rule)) == hash(Or(same_rule, other_rule))
+    assert Or(rule, other_rule) != Or(other_rule)
+
+
+def test_rule_fingerprint():
+    rule = MutabilityRule(
+        "state", values=("a", "b"), inst_conditions=(BaseModel.condition_func,)
+    )
+    same_rule = MutabilityRule(
+        "state", values=("b", "a"), inst_conditions=(BaseModel.condition_func,)
+    )
+    assert rule.fingerprint == same_rule.fingerprint
+    assert rule.fingerprint != MutabilityRule("state", values=("a",)).fingerprint
+    assert Or(rule).fingerprint != rule.fingerprint
+    assert pickle.loads(pickle.dumps(rule)).fingerprint == rule.fingerprint
+
+
+def test_rule_pickle():
+    rule = MutabilityRule("state", values=("a", "b"), exclude_fields=("name",))
+    or_obj = Or(rule)
+    assert pickle.loads(pickle.dumps(rule)) == rule
+    assert pickle.loads(pickle.dumps(or_obj)) == or_obj
+
+
+@pytest.mark.django_db
+def test_shared_rule_errors(make_immutable_instance_record):
+    """
+    The instances of the error belong to the validation pass, not to the
+    shared rule.
+    """
+    rule = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+    first = make_immutable_instance_record()
+    second = make_immutable_instance_record()
+    for instance in (first, second):
+        instance.name = "changed"
+        with pytest.raises(RuleMutableException) as exc:
+            BaseMutableModelUpdate(instance).validate((rule,))
+        assert exc.value.params["instances"] == [instance]
+    with pytest.raises(OrMutableException) as exc:
+        BaseMutableModelUpdate(first).validate((Or(rule, rule),))
+    assert len(exc.value.error_list) == 2
+    with pytest.raises(ValidationError):
+        BaseMutableModelUpdate(first).validate((Or(),))
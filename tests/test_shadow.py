@@ -0,0 +1,129 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import caches
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelDepthFoo
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.rule import MutabilityRule
+
+STATE_RULE = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+RELATED_RULE = MutabilityRule(
+    "related_field__state", values=(ModelState.MUTABLE_STATE,)
+)
+
+records = []
+
+
+def record(shadow_records):
+    records.extend(shadow_records)
+
+
+@pytest.fixture
+def shadow(settings, monkeypatch):
+    settings.TXIMMUTABILITY_SHADOW_SAMPLE_RATE = 1
+    settings.TXIMMUTABILITY_SHADOW_RECORDER = "tests.test_shadow.record"
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (STATE_RULE,))
+    records.clear()
+    yield records
+    records.clear()
+
+
+@pytest.mark.django_db
+def test_shadow_records(base_immutable_instance, shadow):
+    base_immutable_instance.name = "changed"
+    with pytest.raises(RuleMutableException):
+        base_immutable_instance.save()
+    (shadow_record,) = shadow
+    assert shadow_record["action"] == "update"
+    assert shadow_record["rule"] == STATE_RULE
+    assert shadow_record["enforced"] is True
+    assert shadow_record["mismatch"] is False
+    for path in ("python", "sql"):
+        assert shadow_record[path]["verdict"] is False
+        assert shadow_record[path]["queries"] == 1
+        assert shadow_record[path]["duration"] > 0
+        assert shadow_record[path]["error"] is None
+
+
+@pytest.mark.django_db
+def test_shadow_rules_not_enforced(base_mutable_instance, shadow, monkeypatch):
+    monkeypatch.setattr(BaseModel, "shadow_rules", (RELATED_RULE,))
+    related = ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+    base_mutable_instance.related_field = related
+    base_mutable_instance.save()
+    BaseModel.objects.filter(pk=base_mutable_instance.pk).update(name="changed")
+    shadow_records = [r for r in shadow if not r["enforced"]]
+    assert [r["action"] for r in shadow_records] == ["update", "update"]
+    for shadow_record in shadow_records:
+        assert shadow_record["model"] is BaseModel
+        assert shadow_record["python"]["verdict"] is False
+    # The saved row is checked as SQL, the related object of the instance
+    # is not saved yet.
+    assert shadow_records[0]["sql"]["verdict"] is True
+    assert shadow_records[1]["sql"]["verdict"] is False
+    assert BaseModel.objects.get(pk=base_mutable_instance.pk).name == "changed"
+
+
+@pytest.mark.django_db
+def test_shadow_sample_rate(base_mutable_instance, shadow, settings, monkeypatch):
+    settings.TXIMMUTABILITY_SHADOW_SAMPLE_RATE = 0
+    base_mutable_instance.name = "changed"
+    base_mutable_instance.save()
+    assert shadow == []
+    monkeypatch.setattr(BaseModel, "shadow_sample_rate", 1)
+    base_mutable_instance.delete()
+    assert [r["action"] for r in shadow] == ["delete"]
+
+
+@pytest.mark.django_db
+def test_shadow_mismatch(base_immutable_instance, shadow, caplog):
+    base_immutable_instance.name = "changed"
+    with mock.patch(
+        "tximmutability.rule.MutabilityRule.check_field_rule", return_value=True
+    ):
+        base_immutable_instance.save()
+    (shadow_record,) = shadow
+    assert shadow_record["python"]["verdict"] is True
+    assert shadow_record["sql"]["verdict"] is False
+    assert shadow_record["mismatch"] is True
+    assert "in Python and False in SQL" in caplog.text
+
+
+@pytest.mark.django_db
+def test_shadow_error(base_mutable_instance, shadow):
+    base_mutable_instance.name = "changed"
+    with mock.patch(
+        "tximmutability.rule.MutabilityRule.get_instance_q",
+        side_effect=ValueError("broken"),
+    ):
+        base_mutable_instance.save()
+    (shadow_record,) = shadow
+    assert shadow_record["sql"]["verdict"] is None
+    assert shadow_record["sql"]["error"] == "ValueError('broken')"
+    assert shadow_record["python"]["verdict"] is True
+    assert BaseModel.objects.get(pk=base_mutable_instance.pk).name == "changed"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_shadow_verdict_cache_not_used(shadow, settings, monkeypatch):
+    """
+    Test - shadow evaluations do not read cached verdicts, the records count
+    the queries of the rule.
+    """
+    settings.TXIMMUTABILITY_VERDICT_CACHE = "default"
+    caches["default"].clear()
+    monkeypatch.setattr(BaseModel, "_mutability_rules", (RELATED_RULE,))
+    related = ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+    instance = BaseModel.objects.create(related_field=related)
+    for name in ("first", "second"):
+        instance.name = name
+        # The enforced validation caches the verdict of the related object.
+        with pytest.raises(RuleMutableException):
+            instance.save()
+    first, second = [r for r in shadow if r["action"] == "update"]
+    assert first["python"]["queries"] > 0
+    assert second["python"]["queries"] == first["python"]["queries"]
+    assert second["python"]["verdict"] is False
+    caches["default"].clear()
@@ -0,0 +1,71 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel
+from tximmutability.rule import MutabilityRule
+
+RULE = MutabilityRule("state", values=(ModelState.MUTABLE_STATE,))
+
+
+@pytest.fixture
+def records():
+    states = [ModelState.MUTABLE_STATE, ModelState.IMMUTABLE_STATE] * 3
+    return [BaseModel.objects.create(state=state) for state in states[:5]]
+
+
+def chunk_queries(queries):
+    return [query for query in queries if query["sql"].endswith("LIMIT 2")]
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_python_rule_iterates_chunks(method_mock, settings, records):
+    """
+    Test - rules checked in Python iterate the queryset in chunks by pk,
+    rows are not kept in the queryset cache.
+    """
+    settings.TXIMMUTABILITY_VALIDATION_CHUNK_SIZE = 2
+    queryset = BaseModel.objects.order_by("-name")
+    with CaptureQueriesContext(connection) as queries:
+        is_mutable, failed_instances = RULE.is_mutable(queryset, "update")
+    assert not is_mutable
+    assert failed_instances == [
+        record for record in records if record.state == ModelState.IMMUTABLE_STATE
+    ]
+    assert len(chunk_queries(queries)) == 3
+    assert queryset._result_cache is None
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_python_rule_stops_at_first_failure(method_mock, settings, records):
+    settings.TXIMMUTABILITY_VALIDATION_CHUNK_SIZE = 2
+    settings.TXIMMUTABILITY_REPORT_ALL_FAILED_INSTANCES = False
+    with CaptureQueriesContext(connection) as queries:
+        is_mutable, failed_instances = RULE.is_mutable(
+            BaseModel.objects.all(), "update"
+        )
+    assert not is_mutable
+    assert failed_instances == [records[1]]
+    assert len(chunk_queries(queries)) == 1
+
+
+@pytest.mark.django_db
+def test_sql_rule_stops_at_first_failure(settings, records):
+    settings.TXIMMUTABILITY_REPORT_ALL_FAILED_INSTANCES = False
+    is_mutable, failed_instances = RULE.is_mutable(BaseModel.objects.all(), "update")
+    assert not is_mutable
+    assert len(failed_instances) == 1
+
+
+@pytest.mark.django_db
+@mock.patch("tximmutability.rule.MutabilityRule.get_mutable_q", return_value=None)
+def test_python_rule_sliced_queryset(method_mock, settings, records):
+    settings.TXIMMUTABILITY_VALIDATION_CHUNK_SIZE = 2
+    queryset = BaseModel.objects.order_by("pk")[:2]
+    is_mutable, failed_instances = RULE.is_mutable(queryset, "update")
+    assert failed_instances == [records[1]]
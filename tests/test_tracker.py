@@ -0,0 +1,101 @@
+import pytest
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelLazyTracked, ModelRuleFieldsTracked
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import Or, get_tracked_fields
+
+
+def test_tracked_fields_excluded_by_every_rule():
+    rules = (
+        MutabilityRule("state", values=("a",), exclude_fields=("description", "name")),
+        Or(
+            MutabilityRule("surname", values=("b",), exclude_fields=("name",)),
+            MutabilityRule("related_field__state", values=("c",)),
+        ),
+    )
+    assert get_tracked_fields(BaseModel, rules[:1]) == {
+        "id",
+        "surname",
+        "related_field_id",
+        "own_related_field_id",
+    }
+    # A rule on a related field excludes no local field.
+    assert get_tracked_fields(BaseModel, rules) == {
+        field.attname for field in BaseModel._meta.concrete_fields
+    }
+
+
+def test_tracked_fields_exclude_on_update():
+    rules = (MutabilityRule("state", values=("a",), exclude_on_update=True),)
+    assert get_tracked_fields(BaseModel, rules) == set()
+    assert get_tracked_fields(BaseModel, ()) == set()
+
+
+@pytest.mark.django_db
+def test_rule_fields_tracker():
+    instance = ModelRuleFieldsTracked.objects.create(notes="x" * 10000)
+    assert instance.tracker.fields == {"id", "name"}
+    assert set(instance.tracker.saved_data) == {"id", "name"}
+
+    instance.notes = "changed"
+    instance.save()
+
+    instance.name = "changed"
+    with pytest.raises(RuleMutableException):
+        instance.save()
+
+    instance.refresh_from_db()
+    instance.state = ModelState.MUTABLE_STATE
+    instance.save()
+    instance.name = "changed"
+    instance.save()
+
+
+@pytest.mark.django_db
+def test_lazy_tracker_no_snapshot_on_load():
+    ModelLazyTracked.objects.bulk_create([ModelLazyTracked() for _ in range(3)])
+    instances = list(ModelLazyTracked.objects.all())
+    assert all("_tracker" not in instance.__dict__ for instance in instances)
+    instance = instances[0]
+    assert instance.tracker.changed() == {}
+    assert instance.tracker.saved_data == {}
+
+
+@pytest.mark.django_db
+def test_lazy_tracker_copy_on_write():
+    instance = ModelLazyTracked.objects.create()
+    instance = ModelLazyTracked.objects.get(pk=instance.pk)
+    instance.name = "first"
+    instance.name = "second"
+    assert instance.tracker.saved_data == {"name": "Lazy"}
+    assert instance.tracker.changed() == {"name": "Lazy"}
+    assert instance.tracker.has_changed("name")
+    assert not instance.tracker.has_changed("notes")
+    with pytest.raises(RuleMutableException):
+        instance.save()
+
+    instance.name = "Lazy"
+    assert instance.tracker.changed() == {}
+    instance.state = ModelState.MUTABLE_STATE
+    instance.save()
+    assert instance.tracker.changed() == {}
+    instance.name = "changed"
+    instance.save()
+    assert instance.tracker.saved_data == {}
+
+
+@pytest.mark.django_db
+def test_lazy_tracker_deferred_field(django_assert_num_queries):
+    instance = ModelLazyTracked.objects.create()
+    instance = ModelLazyTracked.objects.only("state").get(pk=instance.pk)
+    with django_assert_num_queries(0):
+        instance.notes = "changed"
+    with django_assert_num_queries(1):
+        assert instance.tracker.changed() == {"notes": ""}
+    with pytest.raises(RuleMutableException):
+        instance.save()
+    instance.refresh_from_db()
+    assert instance.notes == ""
+    assert instance.tracker.changed() == {}
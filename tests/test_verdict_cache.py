@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import caches
+
+from tests.testapp.constants import ModelState
+from tests.testapp.models import BaseModel, ModelDepthFoo
+from tximmutability.cache import get_verdict, get_verdict_key
+from tximmutability.exceptions import RuleMutableException
+from tximmutability.rule import MutabilityRule
+from tximmutability.services import BaseMutableModelUpdate
+
+RULES = (MutabilityRule("related_field__state", values=(ModelState.MUTABLE_STATE,)),)
+
+
+@pytest.fixture(params=["default", "files"])
+def verdict_cache(request, settings):
+    settings.TXIMMUTABILITY_VERDICT_CACHE = request.param
+    cache = caches[request.param]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def locked_parent(monkeypatch):
+    monkeypatch.setattr(BaseModel, "_mutability_rules", RULES)
+    return ModelDepthFoo.objects.create(state=ModelState.IMMUTABLE_STATE)
+
+
+def validate_update(instance):
+    instance.name = "changed"
+    BaseMutableModelUpdate(instance).validate(RULES)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_verdict_shared(verdict_cache, locked_parent, django_assert_num_queries):
+    """
+    Test - the verdict of a locked parent is read from the cache, the parent
+    is not loaded again.
+    """
+    first = BaseModel.objects.create(related_field=locked_parent)
+    second = BaseModel.objects.create(related_field=locked_parent)
+    with pytest.raises(RuleMutableException):
+        validate_update(first)
+    with django_assert_num_queries(0):
+        with pytest.raises(RuleMutableException):
+            validate_update(second)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_verdict_invalidated_on_save(verdict_cache, locked_parent):
+    instance = BaseModel.objects.create(related_field=locked_parent)
+    with pytest.raises(RuleMutableException):
+        validate_update(instance)
+    locked_parent.state = ModelState.MUTABLE_STATE
+    locked_parent.save(force_mutability=True)
+    validate_update(instance)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_verdict_not_invalidated_by_other_fields(
+    verdict_cache, locked_parent, django_assert_num_queries
+):
+    instance = BaseModel.objects.create(related_field=locked_parent)
+    with pytest.raises(RuleMutableException):
+        validate_update(instance)
+    locked_parent.name = "renamed"
+    locked_parent.save(force_mutability=True, update_fields=["name"])
+    with django_assert_num_queries(0):
+        with pytest.raises(RuleMutableException):
+            validate_update(instance)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_verdict_invalidated_on_queryset_update(verdict_cache, locked_parent):
+    parent = ModelDepthFoo.objects.create(state=ModelState.MUTABLE_STATE)
+    instance = BaseModel.objects.create(related_field=parent)
+    validate_update(instance)
+    ModelDepthFoo.objects.filter(pk=parent.pk).update(
+        force_mutability=True, state=ModelState.IMMUTABLE_STATE
+    )
+    with pytest.raises(RuleMutableException):
+        validate_update(instance)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_verdict_invalidated_on_delete(verdict_cache, locked_parent):
+    instance = BaseModel.objects.create(related_field=locked_parent)
+    with pytest.raises(RuleMutableException):
+        validate_update(instance)
+    pk = locked_parent.pk
+    locked_parent.delete(force_mutability=True)
+    ModelDepthFoo.objects.create(pk=pk, state=ModelState.MUTABLE_STATE)
+    instance = BaseModel.objects.create(related_field_id=pk)
+    validate_update(instance)
+
+
+@pytest.mark.django_db
+def test_verdict_cached_on_commit(
+    verdict_cache, locked_parent, django_capture_on_commit_callbacks
+):
+    """
+    Test - verdicts read in a transaction are cached once it is committed.
+    """
+    instance = BaseModel.objects.create(related_field=locked_parent)
+    key = get_verdict_key(ModelDepthFoo, locked_parent.pk, RULES[0], ["state"])
+    with django_capture_on_commit_callbacks() as callbacks:
+        with pytest.raises(RuleMutableException):
+            validate_update(instance)
+    assert get_verdict(key) is None
+    for callback in callbacks:
+        callback()
+    assert get_verdict(key) is False
@@ -1,9 +1,11 @@
 from __future__ import absolute_import, unicode_literals
 
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
 from tests.testapp.constants import ModelState
-from tximmutability.models import MutableModel, MutableQuerySet
+from tximmutability.models import RULE_FIELDS, MutableModel, MutableQuerySet
 from tximmutability.rule import MutabilityRule
 
 
@@ -34,6 +36,7 @@ class ModelDepthFoo(BaseAbsModel):
     related_field = models.ForeignKey(
         'self', on_delete=models.CASCADE, null=True, blank=True
     )
+    attachments = GenericRelation('ModelAttachment')
 
     _mutability_rules = (BaseAbsModel.get_mutability_rule(),)
 
@@ -80,3 +83,47 @@ class ModelFooReverse(BaseAbsModel):
     related_field = models.ForeignKey(
         "BaseModel", on_delete=models.CASCADE, null=True, blank=True
     )
+
+
+class ModelRuleFieldsTracked(BaseAbsModel):
+    name = models.CharField(null=False, max_length=50, default='Tracked')
+    state = models.CharField(max_length=50, default=ModelState.IMMUTABLE_STATE)
+    notes = models.TextField(default='')
+
+    trackable_fields = RULE_FIELDS
+    _mutability_rules = (BaseAbsModel.get_mutability_rule(exclude_fields=('notes',)),)
+
+
+class ModelLazyTracked(BaseAbsModel):
+    name = models.CharField(null=False, max_length=50, default='Lazy')
+    state = models.CharField(max_length=50, default=ModelState.IMMUTABLE_STATE)
+    notes = models.TextField(default='')
+
+    lazy_tracking = True
+    _mutability_rules = (BaseAbsModel.get_mutability_rule(),)
+
+
+class ModelAttachment(BaseAbsModel):
+    name = models.CharField(null=False, max_length=50, default='Attachment')
+    state = models.CharField(max_length=50, default=ModelState.IMMUTABLE_STATE)
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, null=True, blank=True
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    content_object = GenericForeignKey()
+
+    _mutability_rules = (
+        BaseAbsModel.get_mutability_rule(field='content_object__state'),
+    )
+
+
+class ModelTag(BaseAbsModel):
+    name = models.CharField(null=False, max_length=50, default='Tag')
+    state = models.CharField(max_length=50, default=ModelState.IMMUTABLE_STATE)
+    items = models.ManyToManyField(ModelDepthFoo, related_name='tags', blank=True)
+
+
+class ModelDepthFooChild(ModelDepthFoo):
+    notes = models.TextField(default='')
+
+    guarded_save = True
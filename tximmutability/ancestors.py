@@ -0,0 +1,148 @@
+"""
+Rules on the ancestors of a row through a self-referential foreign key
+(MutabilityRule.ancestors), e.g. the parent folder of a folder.
+
+The ancestors of a row are walked with a recursive CTE, up to a depth limit,
+in a single query whatever the depth of the tree: a correlated
+NOT EXISTS (WITH RECURSIVE ...) subquery that matches the rows with no
+ancestor out of the rule values.
+"""
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import BooleanField, Expression, F, Q
+
+from .conf import get_setting
+
+CTE_NAME = 'tximmutability_ancestors'
+PARENT_ALIAS = 'tximmutability_parent'
+ANCESTOR_ALIAS = 'tximmutability_ancestor'
+
+
+class AncestorsMutable(Expression):
+    """
+    Boolean expression, true if no ancestor of the row, up to max_depth
+    levels, has a value of rule_field out of values. Ancestors are walked from
+    start (the parent key of the row) through parent_field.
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, start, parent_field, rule_field, values, max_depth):
+        super().__init__(output_field=BooleanField())
+        self.start = start
+        self.parent_field = parent_field
+        self.rule_field = rule_field
+        self.values = tuple(values)
+        self.max_depth = max_depth
+
+    def get_source_expressions(self):
+        return [self.start]
+
+    def set_source_expressions(self, exprs):
+        (self.start,) = exprs
+
+    def as_sql(self, compiler, connection):
+        qn = connection.ops.quote_name
+        start_sql, start_params = compiler.compile(self.start)
+        table = qn(self.parent_field.model._meta.db_table)
+        pk_column = qn(self.parent_field.target_field.column)
+        parent_column = qn(self.parent_field.column)
+        immutable_sql, immutable_params = self._get_immutable_sql(connection)
+        sql = (
+            f'NOT EXISTS (WITH RECURSIVE {CTE_NAME} (node, depth) AS ('
+            f'SELECT {start_sql}, 1 '
+            f'UNION ALL '
+            f'SELECT {PARENT_ALIAS}.{parent_column}, {CTE_NAME}.depth + 1 '
+            f'FROM {table} {PARENT_ALIAS} '
+            f'INNER JOIN {CTE_NAME} ON {PARENT_ALIAS}.{pk_column} = {CTE_NAME}.node '
+            f'WHERE {CTE_NAME}.depth < %s) '
+            f'SELECT 1 FROM {CTE_NAME} '
+            f'INNER JOIN {table} {ANCESTOR_ALIAS} '
+            f'ON {ANCESTOR_ALIAS}.{pk_column} = {CTE_NAME}.node '
+            f'WHERE {immutable_sql})'
+        )
+        return sql, (*start_params, self.max_depth, *immutable_params)
+
+    def _get_immutable_sql(self, connection):
+        """
+        Condition on the ancestor out of the values, NULL is a value like
+        any other.
+        """
+        column = f'{ANCESTOR_ALIAS}.{connection.ops.quote_name(self.rule_field.column)}'
+        values = [
+            self.rule_field.get_db_prep_value(value, connection)
+            for value in self.values
+            if value is not None
+        ]
+        placeholders = ', '.join(['%s'] * len(values))
+        if None in self.values:
+            if not values:
+                return f'{column} IS NOT NULL', []
+            return (
+                f'({column} IS NOT NULL AND {column} NOT IN ({placeholders}))',
+                values,
+            )
+        if not values:
+            return '1 = 1', []
+        return f'({column} IS NULL OR {column} NOT IN ({placeholders}))', values
+
+
+def get_ancestors_fields(model, rule):
+    """
+    Self-referential foreign key (rule.ancestors) and field (rule.field_rule)
+    of model walked by the rule.
+    :raise: ImproperlyConfigured
+    """
+    opts = model._meta
+    try:
+        parent_field = opts.get_field(rule.ancestors)
+        field = opts.get_field(rule.field_rule)
+    except FieldDoesNotExist as exc:
+        raise ImproperlyConfigured(f"{rule!r} ancestors of {model.__name__}: {exc}")
+    is_self_key = parent_field.many_to_one and parent_field.concrete
+    if is_self_key:
+        related_opts = parent_field.related_model._meta
+        is_self_key = related_opts.concrete_model is opts.concrete_model
+    if not is_self_key or not parent_field.target_field.primary_key:
+        raise ImproperlyConfigured(
+            f"{rule!r}: ancestors must be a foreign key of {model.__name__} "
+            f"to itself."
+        )
+    if field.is_relation or not field.concrete or field.model is not parent_field.model:
+        raise ImproperlyConfigured(
+            f"{rule!r}: field_rule of a rule with ancestors must be a local "
+            f"field of {model.__name__}."
+        )
+    return parent_field, field
+
+
+def get_max_depth(rule):
+    """
+    Levels of ancestors checked by rule: rule.max_depth, or the
+    ANCESTORS_MAX_DEPTH setting.
+    """
+    if rule.max_depth is None:
+        return get_setting('ANCESTORS_MAX_DEPTH')
+    return rule.max_depth
+
+
+def get_ancestors_q(model, rule, max_depth=None):
+    """
+    Q object that matches the rows of model with no ancestor out of the rule
+    values, up to max_depth levels (get_max_depth() by default).
+    :return: Q
+    """
+    parent_field, field = get_ancestors_fields(model, rule)
+    if max_depth is None:
+        max_depth = get_max_depth(rule)
+    if max_depth < 1:
+        return Q()
+    return Q(
+        AncestorsMutable(
+            F(parent_field.attname),
+            parent_field,
+            field,
+            rule._ordered_values,
+            max_depth,
+        )
+    )
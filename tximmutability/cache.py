@@ -0,0 +1,250 @@
+"""
+Verdicts of the rules shared by processes through the Django cache framework.
+
+A verdict is cached by model, pk, rule and the version of the row. Versions
+are random tokens kept in the cache, a new token is set when the row is saved
+or deleted (post_save/post_delete) and for the whole model when it is updated
+through MutableQuerySet, so old verdicts are never read again.
+Only verdicts of a local field of the row (e.g. the state of the parent) are
+cached, they depend on nothing else than the row.
+"""
+
+import hashlib
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .conf import get_setting
+from .db import get_validation_database
+
+KEY_PREFIX = 'tximmutability'
+
+# False while the verdict cache is turned off for the current validation.
+_verdict_cache_enabled = ContextVar('tximmutability_verdict_cache', default=True)
+
+# {concrete model: names of the fields whose verdicts may be cached}
+_source_fields = {}
+_source_fields_loaded = False
+
+
+def get_verdict_cache():
+    """
+    Cache of the verdicts (setting VERDICT_CACHE), None if disabled.
+    """
+    alias = get_setting('VERDICT_CACHE')
+    return caches[alias] if alias else None
+
+
+@contextmanager
+def verdict_cache(enabled=True):
+    """
+    Turn the verdict cache off for the validation if not enabled (e.g. to
+    measure what the rules cost). Nested validations can not turn it on.
+    """
+    token = _verdict_cache_enabled.set(_verdict_cache_enabled.get() and enabled)
+    try:
+        yield
+    finally:
+        _verdict_cache_enabled.reset(token)
+
+
+def get_verdict_key(model, pk, rule, field_parts):
+    """
+    Cache key of the verdict of rule for the row pk of model, built with the
+    current versions of the row. Return None if the verdict is not cached.
+    :param field_parts: remaining field_rule parts from model
+    :return: str|None
+    """
+    cache = get_verdict_cache()
+    if cache is None or pk is None or not _verdict_cache_enabled.get():
+        return None
+    if not _is_source_field(model, field_parts):
+        return None
+    model = model._meta.concrete_model
+    _register_source_field(model, field_parts[0])
+    model_key, row_key = _get_version_keys(model, pk)
+    versions = cache.get_many([model_key, row_key])
+    for key in (model_key, row_key):
+        if key not in versions:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, timeout=_get_timeout()):
+                version = cache.get(key, version)
+            versions[key] = version
+    digest = _digest(
+        model._meta.label_lower,
+        pk,
+        rule.fingerprint,
+        tuple(field_parts),
+        versions[model_key],
+        versions[row_key],
+    )
+    return f"{KEY_PREFIX}:verdict:{digest}"
+
+
+def get_verdict(key):
+    """
+    :return: bool|None
+    """
+    return get_verdict_cache().get(key)
+
+
+def set_verdict(key, model, verdict):
+    """
+    Cache the verdict once the transaction of the read, if any, is committed.
+    Verdicts read from a database other than the writer (e.g. a replica that
+    may lag behind) are not cached.
+    """
+    cache = get_verdict_cache()
+    writer = router.db_for_write(model)
+    alias = get_validation_database() or router.db_for_read(model)
+    if alias != writer:
+        return
+    if connections[alias].in_atomic_block:
+        transaction.on_commit(
+            lambda: cache.set(key, verdict, timeout=_get_timeout()), using=alias
+        )
+    else:
+        cache.set(key, verdict, timeout=_get_timeout())
+
+
+def invalidate(model, pk=None, using=None):
+    """
+    Set new versions for the row pk of model, or for every row of model if
+    pk is None. Versions are set again on commit, verdicts read by other
+    processes before the commit are not reused.
+    """
+    cache = get_verdict_cache()
+    if cache is None:
+        return
+    opts = model._meta.concrete_model._meta
+    keys = []
+    for concrete_model in [opts.model, *opts.get_parent_list()]:
+        model_key, row_key = _get_version_keys(concrete_model, pk)
+        keys.append(model_key if pk is None else row_key)
+
+    def set_versions():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=_get_timeout())
+
+    set_versions()
+    using = using or router.db_for_write(model)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(set_versions, using=using)
+
+
+def invalidate_updated(model, fields, using=None):
+    """
+    Invalidate the verdicts of model if fields updated by a queryset are
+    source fields of cached verdicts.
+    """
+    if get_verdict_cache() is None:
+        return
+    if _get_model_source_fields(model) & set(fields):
+        invalidate(model, using=using)
+
+
+def get_source_fields():
+    """
+    Fields whose verdicts may be cached, by concrete model. Loaded from the
+    rules of every model, so a process invalidates the verdicts cached by
+    other processes.
+    """
+    global _source_fields_loaded
+    if not _source_fields_loaded and apps.ready:
+        _source_fields_loaded = True
+        for model in apps.get_models():
+            for rule in _iter_rules(getattr(model, '_mutability_rules', ())):
+                _register_rule(model, rule.field_rule.split('__'))
+    return _source_fields
+
+
+def _get_model_source_fields(model):
+    opts = model._meta.concrete_model._meta
+    source_fields = get_source_fields()
+    return set().union(
+        *(source_fields.get(m, ()) for m in [opts.model, *opts.get_parent_list()])
+    )
+
+
+def _iter_rules(rules_or_conditions):
+    for rule_or_condition in rules_or_conditions:
+        inner = getattr(rule_or_condition, 'rules_or_conditions', None)
+        if inner is None:
+            yield rule_or_condition
+        else:
+            yield from _iter_rules(inner)
+
+
+def _register_rule(model, field_parts):
+    opts = model._meta
+    for field_name in field_parts:
+        try:
+            field = opts.get_field(field_name)
+        except FieldDoesNotExist:
+            return
+        if not field.is_relation:
+            _register_source_field(opts.concrete_model, field_name)
+            return
+        if field.related_model is None:
+            return
+        opts = field.related_model._meta
+
+
+def _register_source_field(model, field_name):
+    if model not in _source_fields:
+        _source_fields[model] = set()
+        post_delete.connect(
+            _invalidate_deleted,
+            sender=model,
+            dispatch_uid=f'{KEY_PREFIX}:{model._meta.label_lower}',
+        )
+    _source_fields[model].add(field_name)
+
+
+def _is_source_field(model, field_parts):
+    if len(field_parts) != 1:
+        return False
+    try:
+        field = model._meta.get_field(field_parts[0])
+    except FieldDoesNotExist:
+        return False
+    return field.concrete and not field.is_relation
+
+
+def _get_version_keys(model, pk):
+    label = model._meta.label_lower
+    return (
+        f"{KEY_PREFIX}:version:{label}",
+        f"{KEY_PREFIX}:version:{label}:{_digest(pk)}",
+    )
+
+
+def _get_timeout():
+    return get_setting('VERDICT_CACHE_TIMEOUT')
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _invalidate_saved(sender, instance, update_fields=None, using=None, **kwargs):
+    if get_verdict_cache() is None:
+        return
+    source_fields = _get_model_source_fields(sender)
+    if not source_fields:
+        return
+    if update_fields is not None and not source_fields & set(update_fields):
+        return
+    invalidate(sender, instance.pk, using=using)
+
+
+def _invalidate_deleted(sender, instance, using=None, **kwargs):
+    invalidate(sender, instance.pk, using=using)
+
+
+post_save.connect(_invalidate_saved, dispatch_uid=f'{KEY_PREFIX}:post_save')
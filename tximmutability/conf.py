@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+DEFAULTS = {
+    # Database alias used to read the saved state on validation, e.g. a replica.
+    'READ_DATABASE': None,
+    # Cache alias where the verdicts of the rules are shared, e.g. 'default'.
+    'VERDICT_CACHE': None,
+    # Timeout of the cached verdicts, the cache default if not set.
+    'VERDICT_CACHE_TIMEOUT': DEFAULT_TIMEOUT,
+    # Seconds before the locked pk indexes are loaded again, None to never
+    # expire.
+    'LOCKED_PK_INDEX_TIMEOUT': 60,
+    # Rows fetched by query when a queryset is validated in Python.
+    'VALIDATION_CHUNK_SIZE': 2000,
+    # Report every instance that breaks a rule of a queryset validation, or
+    # stop at the first one.
+    'REPORT_ALL_FAILED_INSTANCES': True,
+    # Fraction (0 to 1) of the operations whose rules are also evaluated in
+    # shadow mode, by the Python and the SQL paths, without enforcing them.
+    'SHADOW_SAMPLE_RATE': 0,
+    # Callable (or its dotted path) that receives the shadow records, they
+    # are logged by default.
+    'SHADOW_RECORDER': None,
+    # Levels of ancestors checked by the rules with ancestors
+    # (MutabilityRule.ancestors), also a guard against cycles.
+    'ANCESTORS_MAX_DEPTH': 100,
+}
+
+
+def get_setting(name):
+    """
+    Get a tximmutability setting, defined in Django settings with the
+    "TXIMMUTABILITY_" prefix.
+    """
+    return getattr(settings, f'TXIMMUTABILITY_{name}', DEFAULTS[name])
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections, router
+
+from .conf import get_setting
+
+_validation_database = ContextVar('tximmutability_validation_database', default=None)
+
+
+def get_validation_database():
+    """
+    Database alias where the current validation reads, None if reads are not
+    routed.
+    """
+    return _validation_database.get()
+
+
+def resolve_validation_database(model, using=None, instance=None):
+    """
+    Database alias to read from on validation: using, or the READ_DATABASE
+    setting. Inside an active transaction of the writer database the writer is
+    used, a replica would not see the changes of the transaction.
+    :return: str|None
+    """
+    using = using or get_setting('READ_DATABASE')
+    if using is None:
+        return None
+    writer = router.db_for_write(model, instance=instance)
+    if connections[writer].in_atomic_block:
+        return writer
+    return using
+
+
+@contextmanager
+def validation_database(model, using=None, instance=None):
+    """
+    Route the reads of the validation to the resolved database alias.
+    Nested validations keep the database of the outer one.
+    """
+    alias = get_validation_database() or resolve_validation_database(
+        model, using=using, instance=instance
+    )
+    token = _validation_database.set(alias)
+    try:
+        yield alias
+    finally:
+        _validation_database.reset(token)
+
+
+def using_validation_database(queryset):
+    """
+    Bind queryset to the database of the current validation, if any.
+    """
+    alias = get_validation_database()
+    return queryset if alias is None else queryset.using(alias)
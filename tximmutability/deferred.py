@@ -0,0 +1,222 @@
+"""
+Validation of the updates of a unit of work deferred to the end of the block,
+like deferred constraints.
+
+Inside deferred_validation() MutableModel.save() records the updated rows
+instead of validating them. When the block ends the rows are validated
+together, a query by model and rule when the rule can be expressed as SQL,
+and any violation is raised inside the transaction so the whole block is
+rolled back.
+
+Rows are checked as they were before the block: the saved value of a local
+field_rule changed in the block is the one kept by the tracker on its first
+change (read from DB on the first save of the row in the block if the field
+is not tracked), the rest of the row (conditions, related objects) is read
+at the end of the block. Creates, deletes and queryset updates are validated
+immediately.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+
+from .services import BaseMutableModelUpdate, Or, _iter_rules
+
+_deferred_validation = ContextVar('tximmutability_deferred_validation', default=None)
+
+
+class DeferredValidation:
+    """
+    Updated rows recorded in a deferred_validation() block.
+    """
+
+    def __init__(self):
+        # {(model, pk): _DeferredRow}
+        self.rows = {}
+
+    def add(self, action, rules_and_conditions):
+        """
+        Record the update of the instance of action.
+        :param action: BaseMutableModelUpdate of an instance
+        """
+        instance = action.model_instance
+        key = (instance._meta.concrete_model, instance.pk)
+        row = self.rows.get(key)
+        if row is None:
+            # Recorded on its first save, before anything of the block is
+            # written to the row.
+            row = self.rows[key] = _DeferredRow(instance, rules_and_conditions)
+        if not action.fields_names:
+            # Nothing changed, no rule is applied.
+            return
+        row.update(action, rules_and_conditions)
+
+    def discard(self, instance):
+        """
+        Forget the updates of a deleted instance.
+        """
+        self.rows.pop((instance._meta.concrete_model, instance.pk), None)
+
+    def validate(self):
+        """
+        Validate the recorded updates, grouped by model, rules and updated
+        fields.
+        :raise: ValidationError
+        """
+        groups = {}
+        for row in self.rows.values():
+            if not row.fields:
+                continue
+            key = (row.instance.__class__, row.rules, frozenset(row.fields))
+            groups.setdefault(key, []).append(row)
+        self.rows = {}
+        for (model, rules, fields), rows in groups.items():
+            instances = [row.instance for row in rows]
+            saved_values = {}
+            for row in rows:
+                for field_name, value in row.saved_values.items():
+                    saved_values[(row.instance.pk, field_name)] = value
+            queryset = model._base_manager.filter(
+                pk__in=[instance.pk for instance in instances]
+            )
+            action = DeferredMutableModelUpdate(queryset, fields, saved_values)
+            action.validate_instances(rules, instances)
+
+
+class _DeferredRow:
+    """
+    Updates of a row in the block: updated fields (names) and saved values
+    of the changed local fields before the block.
+    """
+
+    def __init__(self, instance, rules_and_conditions):
+        self.instance = instance
+        self.rules = ()
+        self.fields = set()
+        self.saved_values = self._get_untracked_values(instance, rules_and_conditions)
+
+    @staticmethod
+    def _get_untracked_values(instance, rules_and_conditions):
+        """
+        Saved values of the local field_rule not tracked by the tracker of
+        instance (e.g. trackable_fields = RULE_FIELDS), read from DB once
+        the row is recorded, its changes in the block are not known.
+        """
+        opts = instance._meta
+        tracked = instance.tracker.fields
+        attnames = set()
+        for rule in _iter_rules(rules_and_conditions):
+            try:
+                field = opts.get_field(rule.field_rule)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.is_relation:
+                if field.attname not in tracked:
+                    attnames.add(field.attname)
+        if not attnames:
+            return {}
+        saved_values = (
+            instance.__class__._base_manager.using(instance._state.db)
+            .filter(pk=instance.pk)
+            .values(*attnames)
+            .first()
+        )
+        return saved_values or {}
+
+    def update(self, action, rules_and_conditions):
+        instance = action.model_instance
+        opts = instance._meta
+        # Changed fields are columns, or attnames from the tracker.
+        by_column = {field.column: field for field in opts.concrete_fields}
+        by_column.update((field.attname, field) for field in opts.concrete_fields)
+        fields = [by_column[column] for column in action.fields_names]
+        self.instance = instance
+        self.rules = tuple(rules_and_conditions)
+        self.fields.update(field.name for field in fields)
+        tracked = instance.tracker.fields
+        for field in fields:
+            if field.is_relation or field.attname in self.saved_values:
+                continue
+            if field.attname in tracked:
+                self.saved_values[field.attname] = instance.tracker.previous(
+                    field.attname
+                )
+
+
+class DeferredMutableModelUpdate(BaseMutableModelUpdate):
+    """
+    Update of the rows recorded in a deferred_validation() block. Rules on a
+    local field changed in the block are checked against its saved value
+    before the block, in memory.
+    """
+
+    def __init__(self, queryset, update_fields, saved_values):
+        super().__init__(queryset, update_fields=update_fields)
+        # {(pk, attname): value}
+        self.saved_values = saved_values
+
+    def get_rule_or_condition_failures(self, rule_or_condition, instances):
+        if isinstance(rule_or_condition, Or) or self.is_rule_excluded(
+            rule_or_condition
+        ):
+            return super().get_rule_or_condition_failures(rule_or_condition, instances)
+        field_name = rule_or_condition.field_rule
+        changed = []
+        unchanged = []
+        for instance in instances:
+            if (instance.pk, field_name) in self.saved_values:
+                changed.append(instance)
+            else:
+                unchanged.append(instance)
+        failures = super().get_rule_or_condition_failures(rule_or_condition, unchanged)
+        # Rows met by their saved value, their ancestors are still checked.
+        met = []
+        for instance in changed:
+            saved_value = self.saved_values[(instance.pk, field_name)]
+            if rule_or_condition.has_value(saved_value):
+                met.append(instance)
+                continue
+            skip_reason = rule_or_condition.get_skip_reason(
+                instance, conditions=self.conditions
+            )
+            if skip_reason is not None:
+                continue
+            failures[instance.pk] = (rule_or_condition, instance)
+        for instance in rule_or_condition.get_ancestors_failed_instances(met):
+            skip_reason = rule_or_condition.get_skip_reason(
+                instance, conditions=self.conditions
+            )
+            if skip_reason is None:
+                failures[instance.pk] = (rule_or_condition, instance)
+        return failures
+
+
+def get_deferred_validation():
+    """
+    DeferredValidation of the current deferred_validation() block, None
+    outside of it.
+    """
+    return _deferred_validation.get()
+
+
+@contextmanager
+def deferred_validation(using=None):
+    """
+    Defer the validation of MutableModel.save() updates to the end of the
+    block, in a transaction (atomic) rolled back if a rule is not met.
+    Nested blocks are validated by the outermost one.
+    :raise: ValidationError
+    """
+    if get_deferred_validation() is not None:
+        yield get_deferred_validation()
+        return
+    deferred = DeferredValidation()
+    with transaction.atomic(using=using):
+        token = _deferred_validation.set(deferred)
+        try:
+            yield deferred
+        finally:
+            _deferred_validation.reset(token)
+        deferred.validate()
@@ -0,0 +1,303 @@
+"""
+In-process index of the locked pks of a model (MutableModel.locked_pk_index).
+
+For models where a small and stable fraction of rows is immutable, the pks of
+the rows not allowed by each rule are loaded once and kept current by the
+hooks of the library (save, queryset update and delete). Bulk updates by pk
+and deletes are allowed in memory when none of their pks is locked. Locked
+pks are always checked again at DB, so the index never rejects by itself.
+
+Only rules on a local field, without queryset conditions and with <Q>
+conditions on local fields, are indexed. Writes of other processes are seen
+when the index expires (setting LOCKED_PK_INDEX_TIMEOUT).
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.lookups import Exact, In
+from django.db.models.sql.where import AND
+
+from .conf import get_setting
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class PkSet:
+    """
+    Compact set of integer pks, a sorted array of 64 bits integers.
+    """
+
+    __slots__ = ('_pks',)
+
+    def __init__(self, pks=()):
+        self._pks = array('q', sorted(set(pks)))
+
+    def __contains__(self, pk):
+        index = bisect_left(self._pks, pk)
+        return index < len(self._pks) and self._pks[index] == pk
+
+    def __iter__(self):
+        return iter(self._pks)
+
+    def __len__(self):
+        return len(self._pks)
+
+    def add(self, pk):
+        if pk not in self:
+            insort(self._pks, pk)
+
+    def discard(self, pk):
+        index = bisect_left(self._pks, pk)
+        if index < len(self._pks) and self._pks[index] == pk:
+            del self._pks[index]
+
+    def intersection(self, pks):
+        return {pk for pk in pks if pk in self}
+
+
+class LockedPkIndex:
+    """
+    Locked pks of model by rule.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._locked = {}
+        self._dirty = set()
+        self._stale = False
+        self._loaded_at = time.monotonic()
+        self._lock = threading.RLock()
+
+    @property
+    def using(self):
+        return router.db_for_write(self.model)
+
+    def allows(self, action, rules_and_conditions, pks):
+        """
+        Check in memory if the action is allowed by the rules for every pk.
+        Return False if it can not be decided (a rule is not indexed or not
+        loaded yet inside a transaction, a pk is locked or was written in the
+        current transaction), the action must be validated at DB.
+        :param action: BaseMutableModelAction
+        :param pks: iterable of pks
+        :return: bool
+        """
+        pks = set(pks)
+        with self._lock:
+            if not self._refresh(pks):
+                return False
+            for rule_or_condition in rules_and_conditions:
+                locked_pks = self._get_locked_pks(action, rule_or_condition, pks)
+                if locked_pks is None or locked_pks:
+                    return False
+        return True
+
+    def touch(self, pks):
+        """
+        Rows pks were written (or deleted), they are checked again at DB on
+        next use.
+        """
+        with self._lock:
+            self._dirty.update(pks)
+
+    def invalidate(self):
+        """
+        Rows of the model were written, the index is loaded again on next use.
+        """
+        with self._lock:
+            self._stale = True
+
+    def depends_on(self, fields):
+        """
+        Check if writing fields may change the locked pks of the indexed
+        rules.
+        """
+        fields = set(fields)
+        with self._lock:
+            for rule in self._locked:
+                lookups = [rule.field_rule]
+                for condition in rule.inst_conditions + rule.inst_exclusion_conditions:
+                    if isinstance(condition, Q):
+                        lookups.extend(self._get_q_lookups(condition))
+                if fields & {self._get_field_names(lookup) for lookup in lookups}:
+                    return True
+        return False
+
+    def verify(self):
+        """
+        Compare the index with the rules compiled to SQL.
+        :return: {rule: (locked pks missing in the index, pks wrongly
+        locked in the index)} for the rules that do not match.
+        """
+        mismatches = {}
+        with self._lock:
+            for rule, locked_pks in self._locked.items():
+                saved_pks = self._load(rule)
+                dirty = self._dirty
+                missing = set(saved_pks) - set(locked_pks) - dirty
+                unexpected = set(locked_pks) - set(saved_pks) - dirty
+                if missing or unexpected:
+                    mismatches[rule] = (missing, unexpected)
+        return mismatches
+
+    def is_indexed(self, rule):
+        """
+        Check if the rule depends only on local fields of the row.
+        """
+        if rule.queryset_conditions or rule.queryset_exclusion_conditions:
+            return False
+        if rule.ancestors is not None:
+            # Depends on other rows of the model.
+            return False
+        if not self._is_local_lookup(rule.field_rule):
+            return False
+        for condition in rule.inst_conditions + rule.inst_exclusion_conditions:
+            if isinstance(condition, Q) and not self._is_local_q(condition):
+                return False
+        return rule.get_row_q(self.model) is not None
+
+    def _get_locked_pks(self, action, rule_or_condition, pks):
+        inner = getattr(rule_or_condition, 'rules_or_conditions', None)
+        if inner is not None:
+            # Or: rows locked by every rule.
+            locked_pks = set(pks)
+            for r__or__orc in inner:
+                if not locked_pks:
+                    break
+                branch_pks = self._get_locked_pks(action, r__or__orc, locked_pks)
+                if branch_pks is None:
+                    return None
+                locked_pks &= branch_pks
+            return locked_pks
+        if action.is_rule_excluded(rule_or_condition):
+            return set()
+        if rule_or_condition not in self._locked:
+            if not self.is_indexed(rule_or_condition):
+                return None
+            if connections[self.using].in_atomic_block:
+                # Uncommitted writes would be kept if rolled back.
+                return None
+            self._locked[rule_or_condition] = PkSet(self._load(rule_or_condition))
+        return self._locked[rule_or_condition].intersection(pks)
+
+    def _refresh(self, pks):
+        """
+        Load again the expired index and the rows written. Rows written in
+        the current transaction can not be checked in memory, it may be
+        rolled back.
+        :return: bool, False if some of pks can not be checked in memory.
+        """
+        in_transaction = connections[self.using].in_atomic_block
+        timeout = get_setting('LOCKED_PK_INDEX_TIMEOUT')
+        expired = timeout is not None and time.monotonic() - self._loaded_at > timeout
+        if self._stale or expired:
+            if in_transaction:
+                return False
+            self._locked = {}
+            self._dirty = set()
+            self._stale = False
+            self._loaded_at = time.monotonic()
+        if not self._dirty:
+            return True
+        if in_transaction:
+            return not self._dirty & pks
+        dirty = list(self._dirty)
+        for rule, locked_pks in self._locked.items():
+            saved_pks = set(self._load(rule, pks=dirty))
+            for pk in dirty:
+                if pk in saved_pks:
+                    locked_pks.add(pk)
+                else:
+                    locked_pks.discard(pk)
+        self._dirty = set()
+        return True
+
+    def _load(self, rule, pks=None):
+        queryset = self.model._base_manager.using(self.using)
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        return queryset.exclude(rule.get_row_q(self.model)).values_list('pk', flat=True)
+
+    def _is_local_lookup(self, lookup):
+        field_name = lookup.split('__')[0]
+        if field_name == 'pk':
+            return True
+        try:
+            field = self.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.is_relation
+
+    def _get_field_names(self, lookup):
+        return lookup.split('__')[0]
+
+    def _get_q_lookups(self, q):
+        for child in q.children:
+            if isinstance(child, Q):
+                yield from self._get_q_lookups(child)
+            else:
+                yield child[0]
+
+    def _is_local_q(self, q):
+        for child in q.children:
+            if isinstance(child, Q):
+                if not self._is_local_q(child):
+                    return False
+            elif not self._is_local_lookup(child[0]):
+                return False
+        return True
+
+
+def get_locked_pk_index(model):
+    """
+    Locked pk index of model, None if it is not enabled (locked_pk_index) or
+    the pk of the model is not an integer.
+    """
+    if not getattr(model, 'locked_pk_index', False):
+        return None
+    if model._meta.pk.get_internal_type() not in (
+        'AutoField',
+        'BigAutoField',
+        'SmallAutoField',
+        'IntegerField',
+        'BigIntegerField',
+        'SmallIntegerField',
+        'PositiveIntegerField',
+        'PositiveBigIntegerField',
+        'PositiveSmallIntegerField',
+    ):
+        return None
+    model = model._meta.concrete_model
+    with _indexes_lock:
+        if model not in _indexes:
+            _indexes[model] = LockedPkIndex(model)
+        return _indexes[model]
+
+
+def get_filtered_pks(queryset):
+    """
+    Pks of a queryset filtered only by pk (e.g. filter(pk__in=[...])), None
+    for any other queryset.
+    """
+    query = queryset.query
+    if query.is_sliced or query.combinator or query.distinct:
+        return None
+    where = query.where
+    if where.connector != AND or where.negated or len(where.children) != 1:
+        return None
+    lookup = where.children[0]
+    target = getattr(getattr(lookup, 'lhs', None), 'target', None)
+    if target is None or target != queryset.model._meta.pk:
+        return None
+    if isinstance(lookup, In) and isinstance(lookup.rhs, (list, tuple, set)):
+        return [pk for pk in lookup.rhs if pk is not None]
+    if isinstance(lookup, Exact) and lookup.rhs_is_direct_value():
+        return [lookup.rhs]
+    return None
@@ -1,18 +1,50 @@
 # -*- coding: utf-8 -*-
 
 import logging
+from contextlib import nullcontext
 
-from django.db import models
+from django.core.exceptions import FieldError
+from django.db import models, router, transaction
+from django.db.models import Case, Value, When
+from django.db.models.deletion import Collector
+from django.utils.translation import gettext_lazy
 from model_utils import FieldTracker
+from model_utils.tracker import (
+    DescriptorWrapper,
+    FieldInstanceTracker,
+    lightweight_deepcopy,
+)
 
+from .cache import invalidate_updated
+from .deferred import get_deferred_validation
+from .exceptions import RuleMutableException
+from .index import get_filtered_pks, get_locked_pk_index
 from .services import (
     BaseMutableModelCreate,
     BaseMutableModelDelete,
     BaseMutableModelUpdate,
+    get_action,
+    get_tracked_fields,
+    validate_collected_delete,
 )
+from .shadow import shadow_validate
 
 logger = logging.getLogger('tximmutability')
 
+# MutableModel.trackable_fields: track only the fields the rules depend on.
+RULE_FIELDS = object()
+
+
+class _MutabilityGuardError(Exception):
+    """
+    Raised when a guarded UPDATE does not match the row because of the rules.
+    """
+
+    def __init__(self, using, rollback):
+        self.using = using
+        self.rollback = rollback
+        super().__init__(using)
+
 
 class AbstractFieldTracker(FieldTracker):
     def finalize_class(self, sender, name='tracker', **kwargs):
@@ -22,25 +54,287 @@ class AbstractFieldTracker(FieldTracker):
             super().finalize_class(sender, **kwargs)
 
 
+# Saved value of a deferred field assigned before it was loaded.
+_DEFERRED = object()
+
+
+class LazyFieldInstanceTracker(FieldInstanceTracker):
+    """
+    Tracker of an instance that keeps only the saved values of the fields
+    assigned since the last save (copy on write). A field not assigned has
+    not changed.
+    """
+
+    def __init__(self, instance, fields, field_map):
+        super().__init__(instance, fields, field_map)
+        self.saved_data = {}
+
+    def set_saved_fields(self, fields=None):
+        if fields is None:
+            self.saved_data = {}
+        else:
+            for field in fields:
+                self.saved_data.pop(field, None)
+
+    def on_set(self, field):
+        """
+        Keep the saved value of field before it is assigned for the first
+        time.
+        """
+        if field in self.saved_data or not self.instance.pk:
+            return
+        if self.field_map[field] not in self.instance.__dict__:
+            # Deferred, read from DB only if it is compared.
+            self.saved_data[field] = _DEFERRED
+        else:
+            self.saved_data[field] = lightweight_deepcopy(self.get_field_value(field))
+
+    def has_changed(self, field):
+        if field not in self.fields:
+            raise FieldError('field "%s" not tracked' % field)
+        if self.instance.pk and field not in self.saved_data:
+            return False
+        return self.previous(field) != self.get_field_value(field)
+
+    def previous(self, field):
+        if not self.instance.pk:
+            return None
+        if field not in self.saved_data:
+            return self.get_field_value(field)
+        if self.saved_data[field] is _DEFERRED:
+            self.load_deferred_saved_data()
+        return self.saved_data[field]
+
+    def changed(self):
+        if not self.instance.pk:
+            fields = self.fields
+        else:
+            self.load_deferred_saved_data()
+            fields = list(self.saved_data)
+        return {
+            field: self.previous(field) for field in fields if self.has_changed(field)
+        }
+
+    def load_deferred_saved_data(self):
+        """
+        Read from DB, in one query, the saved values of the deferred fields
+        assigned before they were loaded.
+        """
+        fields = [
+            field for field, value in self.saved_data.items() if value is _DEFERRED
+        ]
+        if not fields:
+            return
+        instance = self.instance
+        values = (
+            instance.__class__._base_manager.db_manager(
+                instance._state.db, hints={'instance': instance}
+            )
+            .filter(pk=instance.pk)
+            .values_list(*(self.field_map[field] for field in fields))
+            .get()
+        )
+        self.saved_data.update(zip(fields, values))
+
+
+class LazyDescriptorWrapper(DescriptorWrapper):
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return self.descriptor.__get__(instance, owner)
+        except AttributeError:
+            return self.descriptor
+
+    def __set__(self, instance, value):
+        if '_instance_initialized' in instance.__dict__:
+            getattr(instance, self.tracker_attname).on_set(self.field_name)
+        if hasattr(self.descriptor, '__set__'):
+            self.descriptor.__set__(instance, value)
+        else:
+            instance.__dict__[self.field_name] = value
+
+
+class LazyInstanceTracker:
+    """
+    Build the tracker of an instance on first use.
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        tracker = self.tracker
+        instance_tracker = tracker.tracker_class(
+            instance, tracker.fields, tracker.field_map
+        )
+        instance.__dict__[tracker.attname] = instance_tracker
+        return instance_tracker
+
+
+class LazyFieldTracker(AbstractFieldTracker):
+    """
+    Field tracker without snapshot on init, see LazyFieldInstanceTracker.
+    """
+
+    tracker_class = LazyFieldInstanceTracker
+
+    def finalize_class(self, sender, name='tracker', **kwargs):
+        if hasattr(sender, name):
+            return
+        super().finalize_class(sender, name=name, **kwargs)
+        for field_name in self.fields:
+            wrapper = getattr(sender, field_name)
+            setattr(
+                sender,
+                field_name,
+                LazyDescriptorWrapper(field_name, wrapper.descriptor, self.attname),
+            )
+        setattr(sender, self.attname, LazyInstanceTracker(self))
+
+    def initialize_tracker(self, sender, instance, **kwargs):
+        if isinstance(instance, self.model_class):
+            instance._instance_initialized = True
+
+
 class MutableQuerySet(models.QuerySet):
     def __init__(self, *args, **kwargs):
         self.force_mutability = kwargs.pop("force_mutability", False)
         super().__init__(*args, **kwargs)
 
-    def _pre_bulk_update_validate_immutability(self, *args, **kwargs):
+    def _pre_bulk_update_validate_immutability(
+        self, *args, validation_using=None, **kwargs
+    ):
         model = self.model
         update_fields = kwargs
-        if getattr(model, '_mutability_rules', None):
-            if self.exists():
-                BaseMutableModelUpdate(
-                    self, update_fields=update_fields.keys()
-                ).validate(model._mutability_rules)
+        rules = getattr(model, '_mutability_rules', None) or ()
+        shadow_rules = getattr(model, 'shadow_rules', ())
+        if not rules and not shadow_rules:
+            return
+        action = BaseMutableModelUpdate(
+            self, update_fields=update_fields.keys(), using=validation_using
+        )
+        shadow_validate(action, rules, shadow_rules)
+        if not rules:
+            return
+        index = get_locked_pk_index(model)
+        pks = get_filtered_pks(self) if index is not None else None
+        if pks is not None and index.allows(action, rules, pks):
+            return
+        if self.exists():
+            action.validate(rules)
 
-    def update(self, force_mutability=None, *args, **kwargs):
+    def update(self, force_mutability=None, validation_using=None, *args, **kwargs):
         model_forced_mutability = getattr(self, 'force_mutability', False)
         if force_mutability is not True and not model_forced_mutability:
-            self._pre_bulk_update_validate_immutability(*args, **kwargs)
-        return super().update(*args, **kwargs)
+            self._pre_bulk_update_validate_immutability(
+                *args, validation_using=validation_using, **kwargs
+            )
+        updated = super().update(*args, **kwargs)
+        self._written(kwargs.keys())
+        return updated
+
+    def update_mutable_only(self, **kwargs):
+        """
+        Update only the rows allowed by the mutability rules, the rest of the
+        rows are skipped instead of rejecting the whole update.
+        Rules are added to the WHERE clause of the UPDATE statement when they
+        can be expressed as SQL.
+        :return: (number of updated rows, list of skipped pks)
+        """
+        model = self.model
+        rules = getattr(model, '_mutability_rules', None)
+        if not rules or self.force_mutability:
+            return self.update(force_mutability=True, **kwargs), []
+        action = BaseMutableModelUpdate(self, update_fields=kwargs.keys())
+        mutable_q = action.get_mutable_q(rules)
+        if mutable_q is not None:
+            skipped_pks = (
+                list(self.exclude(mutable_q).values_list('pk', flat=True))
+                if mutable_q
+                else []
+            )
+            queryset = self.filter(mutable_q)
+        else:
+            skipped_pks = list(action.get_failed_pks(rules))
+            queryset = self.exclude(pk__in=skipped_pks)
+        updated = super(MutableQuerySet, queryset).update(**kwargs)
+        self._written(kwargs.keys())
+        return updated, skipped_pks
+
+    def _written(self, fields):
+        """
+        Keep the verdicts cache and the locked pk index current after the
+        rows of the queryset were updated.
+        """
+        invalidate_updated(self.model, fields, using=self.db)
+        index = get_locked_pk_index(self.model)
+        if index is not None and index.depends_on(fields):
+            pks = get_filtered_pks(self)
+            if pks is None:
+                index.invalidate()
+            else:
+                index.touch(pks)
+
+    def with_mutability(self, actions=('update', 'delete'), fields=None):
+        """
+        Annotate the rows with a boolean "mutable_<action>" by action, computed
+        from the rules in the same query.
+        :param fields: updated fields, any field by default
+        :raise: ValueError if the rules can not be expressed as SQL
+        """
+        annotations = {}
+        for action in actions:
+            mutable_q = self._get_mutable_q(action, fields)
+            annotations[f'mutable_{action}'] = (
+                Case(
+                    When(mutable_q, then=Value(True)),
+                    default=Value(False),
+                    output_field=models.BooleanField(),
+                )
+                if mutable_q
+                else Value(True, output_field=models.BooleanField())
+            )
+        return self.annotate(**annotations)
+
+    def locked(self, action, fields=None):
+        """
+        Rows not allowed by the rules for action.
+        :raise: ValueError if the rules can not be expressed as SQL
+        """
+        mutable_q = self._get_mutable_q(action, fields)
+        return self.exclude(mutable_q) if mutable_q else self.none()
+
+    def mutable(self, action, fields=None):
+        """
+        Rows allowed by the rules for action.
+        :raise: ValueError if the rules can not be expressed as SQL
+        """
+        return self.filter(self._get_mutable_q(action, fields))
+
+    def _get_mutable_q(self, action, fields=None):
+        mutable_q = get_action(action, self, fields=fields).get_mutable_q(
+            self.model._mutability_rules
+        )
+        if mutable_q is None:
+            raise ValueError(
+                f"{self.model.__name__} mutability rules can not be expressed as SQL."
+            )
+        return mutable_q
+
+    def explain_mutability(self, action, fields=None, validation_using=None):
+        """
+        Plan of the validation of action ("create", "update" or "delete") on
+        the queryset: the rules applied or skipped (and why), whether they
+        are checked in memory, as SQL or in Python, and the SQL.
+        :param fields: updated fields, any field by default
+        :return: [dict]
+        """
+        return get_action(action, self, fields=fields, using=validation_using).explain(
+            self.model._mutability_rules
+        )
 
     def bulk_update(self, objs, fields, batch_size=None, force_mutability=None):
         force_mutability_original_value = self.force_mutability
@@ -67,10 +361,44 @@ class MutableModel(models.Model):
 
     If you want to ignore immutability rules and force execution of the action
     set param force to True
+
+    With validate_cascade the delete is also validated for the objects
+    deleted on cascade, one query by model.
+
+    With guarded_save the rules of an update are added to the WHERE clause of
+    the UPDATE statement instead of being checked before it, so the check and
+    the write are atomic. Rules are only checked in detail if no row is
+    updated.
+
+    With locked_pk_index the pks of the locked rows are kept in memory, bulk
+    updates by pk and deletes of unlocked rows are allowed without querying
+    the DB.
+
+    With trackable_fields = RULE_FIELDS the tracker only keeps the saved
+    values of the fields that can make a rule apply on update (see
+    get_tracked_fields), instead of every field. Rules must be set on the
+    class.
+
+    Inside deferred_validation() the updates of save() are validated
+    together at the end of the block.
+
+    shadow_rules are evaluated, never enforced, for a sample of the
+    operations (shadow_sample_rate, or the SHADOW_SAMPLE_RATE setting)
+    together with the rules, see tximmutability.shadow.
+
+    With lazy_tracking no saved value is copied when the instance is
+    loaded, only when a tracked field is assigned for the first time.
+    Changes made in place (e.g. a dict of a JSONField) are not seen.
     """
 
     _mutability_rules = ()
     trackable_fields = None
+    guarded_save = False
+    validate_cascade = False
+    locked_pk_index = False
+    lazy_tracking = False
+    shadow_rules = ()
+    shadow_sample_rate = None
 
     objects = MutableQuerySet.as_manager()
 
@@ -80,28 +408,178 @@ class MutableModel(models.Model):
     def __init__(self, *args, **kwargs):
         # Workaround for FieldTracker issue:
         # https://github.com/jazzband/django-model-utils/issues/155
-        tracker = AbstractFieldTracker(fields=self.trackable_fields)
-        tracker.finalize_class(self.__class__)
+        if not hasattr(self.__class__, 'tracker'):
+            fields = self.trackable_fields
+            if fields is RULE_FIELDS:
+                fields = get_tracked_fields(self.__class__, self._mutability_rules)
+            tracker_class = (
+                LazyFieldTracker if self.lazy_tracking else AbstractFieldTracker
+            )
+            tracker = tracker_class(fields=fields)
+            tracker.finalize_class(self.__class__)
         super().__init__(*args, **kwargs)
 
     def save(self, *args, **kwargs):
         force_mutability = kwargs.pop("force_mutability", False)
+        guarded_save = kwargs.pop("guarded_save", self.guarded_save)
+        validation_using = kwargs.pop("validation_using", None)
+        self._mutability_guard = None
         if not force_mutability:
             if not self.pk:
-                BaseMutableModelCreate(self).validate(self._mutability_rules)
+                action = BaseMutableModelCreate(self, using=validation_using)
+                shadow_validate(action, self._mutability_rules, self.shadow_rules)
+                action.validate(self._mutability_rules)
             else:
-                BaseMutableModelUpdate(self).validate(self._mutability_rules)
-        super(MutableModel, self).save(*args, **kwargs)
+                action = BaseMutableModelUpdate(
+                    self,
+                    update_fields=kwargs.get('update_fields'),
+                    using=validation_using,
+                )
+                shadow_validate(action, self._mutability_rules, self.shadow_rules)
+                if guarded_save:
+                    self._mutability_guard = action.get_mutable_q(
+                        self._mutability_rules
+                    )
+                if self._mutability_guard is None:
+                    deferred = get_deferred_validation()
+                    if deferred is not None:
+                        deferred.add(action, self._mutability_rules)
+                    else:
+                        action.validate(self._mutability_rules)
+        if not self._mutability_guard:
+            super(MutableModel, self).save(*args, **kwargs)
+            self._written(kwargs.get('update_fields'))
+            return
+        # The tracker resets the saved values even if save fails.
+        saved_data = self.tracker.saved_data.copy()
+        using = kwargs.get('using') or router.db_for_write(
+            self.__class__, instance=self
+        )
+        # Parent tables are written before the guarded UPDATE, they are
+        # rolled back with the savepoint if the save is aborted.
+        savepoint = transaction.atomic(using=using) if self._meta.parents else None
+        try:
+            with savepoint or nullcontext():
+                if savepoint is not None:
+                    self._lock_guarded_row(using)
+                super(MutableModel, self).save(*args, **kwargs)
+        except _MutabilityGuardError as exc:
+            connection = transaction.get_connection(exc.using)
+            if savepoint is None and connection.in_atomic_block:
+                # Only the guarded UPDATE was run and it matched no row,
+                # nothing failed at DB, the transaction can go on.
+                transaction.set_rollback(exc.rollback, using=exc.using)
+            self.tracker.saved_data = saved_data
+            BaseMutableModelUpdate(
+                self, update_fields=kwargs.get('update_fields')
+            ).validate(self._mutability_rules)
+            # Rules hold now, the row changed after the UPDATE.
+            raise RuleMutableException(
+                gettext_lazy(
+                    "The instance was modified concurrently and it could not "
+                    "be updated."
+                )
+            )
+        finally:
+            self._mutability_guard = None
+        self._written(kwargs.get('update_fields'))
+
+    def _written(self, update_fields=None, pk=None):
+        """
+        Keep the locked pk index current after the row was written (or
+        deleted).
+        """
+        index = get_locked_pk_index(self.__class__)
+        if index is None:
+            return
+        if update_fields is None or index.depends_on(update_fields):
+            index.touch([self.pk if pk is None else pk])
+
+    def _lock_guarded_row(self, using):
+        """
+        With multi-table inheritance the parent tables are written before the
+        guarded UPDATE (and may overwrite the columns of the rules): the row
+        is locked and checked against the guard before anything is written.
+        """
+        queryset = self.__class__._base_manager.using(using).select_for_update()
+        if not queryset.filter(self._mutability_guard, pk=self.pk).exists():
+            raise _MutabilityGuardError(using, False)
 
-    def delete(self, *args, **kwargs):
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        On guarded save the UPDATE only matches the row if it is allowed by
+        the rules. If the row exists but is not updated the save is aborted.
+        """
+        guard = getattr(self, '_mutability_guard', None)
+        if not guard or base_qs.model._meta.concrete_model is not (
+            self._meta.concrete_model
+        ):
+            return super()._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update
+            )
+        rollback = (
+            transaction.get_rollback(using)
+            if transaction.get_connection(using).in_atomic_block
+            else False
+        )
+        updated = super()._do_update(
+            base_qs.filter(guard), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise _MutabilityGuardError(using, rollback)
+        return updated
+
+    def delete(self, using=None, keep_parents=False, **kwargs):
         """
         Delete object if there is no restrictions
         To force delete set param force to True
+        To validate the objects deleted on cascade set param validate_cascade
+        to True
         """
         force_mutability = kwargs.pop('force_mutability', False)
-        if not force_mutability:
-            BaseMutableModelDelete(self).validate(self._mutability_rules)
-        super(MutableModel, self).delete(*args, **kwargs)
+        validate_cascade = kwargs.pop('validate_cascade', self.validate_cascade)
+        validation_using = kwargs.pop('validation_using', None)
+        pk = self.pk
+        deferred = get_deferred_validation()
+        if deferred is not None:
+            deferred.discard(self)
+        if force_mutability:
+            deleted = super(MutableModel, self).delete(using, keep_parents)
+            self._written(pk=pk)
+            return deleted
+        action = BaseMutableModelDelete(self, using=validation_using)
+        shadow_validate(action, self._mutability_rules, self.shadow_rules)
+        index = get_locked_pk_index(self.__class__)
+        if index is None or not index.allows(action, self._mutability_rules, [pk]):
+            action.validate(self._mutability_rules)
+        if not validate_cascade:
+            deleted = super(MutableModel, self).delete(using, keep_parents)
+            self._written(pk=pk)
+            return deleted
+        using = using or router.db_for_write(self.__class__, instance=self)
+        assert (
+            self.pk is not None
+        ), "%s object can't be deleted because its %s attribute is set to None." % (
+            self._meta.object_name,
+            self._meta.pk.attname,
+        )
+        collector = Collector(using=using)
+        collector.collect([self], keep_parents=keep_parents)
+        validate_collected_delete(collector, exclude=self)
+        deleted = collector.delete()
+        self._written(pk=pk)
+        return deleted
+
+    def explain_mutability(self, action, fields=None, validation_using=None):
+        """
+        Plan of the validation of action ("create", "update" or "delete") on
+        the instance, like MutableQuerySet.explain_mutability().
+        :param fields: updated fields, the changed fields by default
+        :return: [dict]
+        """
+        return get_action(action, self, fields=fields, using=validation_using).explain(
+            self._mutability_rules, guarded=action == 'update' and self.guarded_save
+        )
 
     def saved_value(self, field):
         """
@@ -0,0 +1,14 @@
+from .db import get_validation_database
+
+
+class ValidationReadRouter:
+    """
+    Route the reads done while validating mutability rules (e.g. in
+    MutableModel.saved_value or relation descriptors) to the validation
+    database. Outside of a validation it has no opinion.
+
+    DATABASE_ROUTERS = ['tximmutability.routers.ValidationReadRouter', ...]
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_validation_database()
@@ -1,16 +1,33 @@
+import hashlib
 import logging
+import operator
+from copy import deepcopy
+from functools import reduce
+from itertools import islice
 from typing import NoReturn, Tuple
 
-from django.core.exceptions import FieldDoesNotExist
-from django.db.models import QuerySet
-from django.db.models.fields.related import ForeignObjectRel, RelatedField
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.db.models.fields.related import (
+    ForeignObjectRel,
+    ManyToManyField,
+    RelatedField,
+)
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy, ngettext
 
+from .ancestors import get_ancestors_fields, get_ancestors_q, get_max_depth
+from .cache import get_verdict, get_verdict_key, set_verdict
+from .conf import get_setting
+from .db import get_validation_database, using_validation_database
 from .exceptions import RuleMutableException
 
 logger = logging.getLogger('txmutability')
 
+# Rule values interned by their ordered tuple, rules with equal values share
+# one frozenset. Rules are defined at import time, so it does not grow.
+_interned_values = {}
+
 
 class MutabilityRule:
     """
@@ -35,19 +52,48 @@ class MutabilityRule:
             otherwise <False>. Default False
         exclude_on_delete <Bool>: To exclude this rule on delete set <True>,
             otherwise <False>. Default False
-        inst_conditions <Tuple>: Tuple of instance methods that return <Bool>.
-            Methods to check before applying this rule.
+        inst_conditions <Tuple>: Tuple of instance methods that return <Bool>
+            or <Q> row filters. Methods to check before applying this rule.
+            <Q> filters are also applied row by row to querysets.
         inst_exclusion_conditions <Tuple>. Tuple of instance methods that
-            return <Bool>. Methods to check before applying this rule.
+            return <Bool> or <Q> row filters. Methods to check before
+            applying this rule. <Q> filters are also applied row by row to
+            querysets.
         queryset_conditions <Tuple>: Tuple of modelmanager methods that return <Bool>.
             Methods to check before applying this rule.
         queryset_exclusion_conditions <Tuple>: Tuple of modelmanager methods that
             return <Bool>. Methods to check before applying this rule.
         error_message  <String>: Message passed on raise.
         error_code <String>: Error code for ValidationError in case rule fails.
+        ancestors <String>: self-referential foreign key of the model, the
+            rule is also met by every ancestor of the row through it.
+            field_rule must be a local field.
+        max_depth <Int>: levels of ancestors checked, the
+            ANCESTORS_MAX_DEPTH setting by default.
 
+    Rules are immutable and hashable: they can be shared between threads and
+    used as cache keys. Values are stored as a frozenset.
     """
 
+    __slots__ = (
+        'field_rule',
+        'values',
+        '_ordered_values',
+        'exclude_fields',
+        'exclude_on_create',
+        'exclude_on_update',
+        'exclude_on_delete',
+        'inst_conditions',
+        'inst_exclusion_conditions',
+        'queryset_conditions',
+        'queryset_exclusion_conditions',
+        'error_message',
+        'error_code',
+        'ancestors',
+        'max_depth',
+        '_hash',
+    )
+
     def __init__(
         self,
         field_rule: str,
@@ -62,58 +108,166 @@ class MutabilityRule:
         queryset_exclusion_conditions: Tuple = None,
         error_message: str = None,
         error_code: str = None,
+        ancestors: str = None,
+        max_depth: int = None,
     ) -> NoReturn:
         assert bool(field_rule), "MutabilityRule.field_rule can not be empty."
         assert (
             isinstance(values, Tuple) and len(values) > 0
         ), "MutabilityRule.values must have at least one element."
+        assert (
+            max_depth is None or max_depth > 0
+        ), "MutabilityRule.max_depth must be greater than 0."
 
-        self.field_rule = field_rule
-        self.values = values
+        init = super().__setattr__
+        init('field_rule', field_rule)
+        values, ordered_values = _intern_values(values)
+        init('values', values)
+        # Values as given, for messages and SQL.
+        init('_ordered_values', ordered_values)
 
-        self.exclude_fields = exclude_fields or ()
+        init('exclude_fields', tuple(exclude_fields or ()))
         # Actions mutable by.
-        self.exclude_on_create = exclude_on_create
-        self.exclude_on_update = exclude_on_update
-        self.exclude_on_delete = exclude_on_delete
+        init('exclude_on_create', exclude_on_create)
+        init('exclude_on_update', exclude_on_update)
+        init('exclude_on_delete', exclude_on_delete)
         # Conditions attr
-        self.inst_conditions = inst_conditions or ()
-        self.inst_exclusion_conditions = inst_exclusion_conditions or ()
-        self.queryset_conditions = queryset_conditions or ()
-        self.queryset_exclusion_conditions = queryset_exclusion_conditions or ()
+        init('inst_conditions', tuple(inst_conditions or ()))
+        init('inst_exclusion_conditions', tuple(inst_exclusion_conditions or ()))
+        init('queryset_conditions', tuple(queryset_conditions or ()))
+        init(
+            'queryset_exclusion_conditions', tuple(queryset_exclusion_conditions or ())
+        )
         # Errors attr
-        self.error_message = error_message
-        self.error_code = error_code
+        init('error_message', error_message)
+        init('error_code', error_code)
+        # Ancestors attr
+        init('ancestors', ancestors)
+        init('max_depth', max_depth)
+        init('_hash', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_hash'}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            super().__setattr__(name, value)
+        values, ordered_values = _intern_values(self._ordered_values)
+        super().__setattr__('values', values)
+        super().__setattr__('_ordered_values', ordered_values)
+        super().__setattr__('_hash', None)
+
+    def _key(self):
+        """
+        What the rule checks. error_message is not part of it, lazy
+        translations are hashed in the active language.
+        """
+        values = self.values
+        if values is self._ordered_values:
+            # Unhashable values.
+            values = tuple(_value_key(value) for value in values)
+        return (
+            self.field_rule,
+            values,
+            frozenset(self.exclude_fields),
+            self.exclude_on_create,
+            self.exclude_on_update,
+            self.exclude_on_delete,
+            self.inst_conditions,
+            self.inst_exclusion_conditions,
+            self.queryset_conditions,
+            self.queryset_exclusion_conditions,
+            self.error_code,
+            self.ancestors,
+            self.max_depth,
+        )
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key() and self.error_message == other.error_message
+
+    def __hash__(self):
+        if self._hash is None:
+            super().__setattr__('_hash', hash(self._key()))
+        return self._hash
+
+    @property
+    def fingerprint(self):
+        """
+        Digest of what the rule checks, stable across processes (conditions
+        are identified by their qualified name). Suitable for shared cache
+        keys.
+        """
+        key = (
+            self.__class__.__name__,
+            self.field_rule,
+            sorted(_value_key(value) for value in self.values),
+            sorted(self.exclude_fields),
+            self.exclude_on_create,
+            self.exclude_on_update,
+            self.exclude_on_delete,
+            [_condition_key(condition) for condition in self.inst_conditions],
+            [_condition_key(condition) for condition in self.inst_exclusion_conditions],
+            [_condition_key(condition) for condition in self.queryset_conditions],
+            [
+                _condition_key(condition)
+                for condition in self.queryset_exclusion_conditions
+            ],
+            self.error_code,
+            self.ancestors,
+            self.max_depth,
+        )
+        return hashlib.sha1(repr(key).encode()).hexdigest()
 
     def __str__(self):
-        return f"{self.__class__.__name__}[{self.field_rule}={self.values}]"
+        return f"{self.__class__.__name__}[{self.field_rule}={self._ordered_values}]"
+
+    def __repr__(self):
+        return f"<{self}>"
 
-    def get_error(self, action):
+    def has_value(self, value):
+        """
+        Check if value is one of the rule values.
+        """
+        try:
+            return value in self.values
+        except TypeError:
+            # Unhashable value (e.g. unsaved instance) looked up in a frozenset.
+            return value in self._ordered_values
+
+    def get_error(self, action, failed_instances=None):
         if self.error_message:
             message = format_lazy(
                 self.error_message,
                 action=action,
                 field_rule=self.field_rule,
-                values=self.values,
+                values=self._ordered_values,
             )
         else:
             base_text = ngettext(
                 "The model rule does not hold for action {action}, field \"{field_rule}\" must have as value \"{values}\".",
                 "The model rule does not hold for action {action}, field \"{field_rule}\" must have as values \"{values}\".",
-                len(self.values),
+                len(self._ordered_values),
             )
             message = format_lazy(
                 base_text,
                 action=action,
                 field_rule=self.field_rule,
-                values=",".join(self.values),
+                values=",".join(self._ordered_values),
             )
 
         return RuleMutableException(
-            message, code=self.error_code, params={"instances": self.failed_instances}
+            message, code=self.error_code, params={"instances": failed_instances or []}
         )
 
-    def is_mutable(self, obj, action):
+    def is_mutable(self, obj, action, report_all=None, compiled=True, conditions=None):
         """
         Check if model obj is in mutable state.
         Model obj is in mutable state if field defined by rule has
@@ -122,33 +276,376 @@ class MutabilityRule:
         :param model_instance: TxerpadBase
         :param field_parts: name of the field or related object field
         (e.g 'state' or 'invoice__state')
+        :param report_all: return every failed instance of a queryset, or
+        stop at the first one. REPORT_ALL_FAILED_INSTANCES setting by
+        default.
+        :param compiled: check a queryset as SQL when field_rule can be
+        expressed as SQL, otherwise row by row in Python.
+        :param conditions: dict, results of the conditions already checked
+        in the validation pass (see get_skip_reason).
         :return: bool
         """
-        self.obj = obj
-        self.is_queryset = isinstance(obj, QuerySet)
-        self.failed_instances = []
-
-        if not self._all_conditions_met():
-            # Not all conditions met. It does not continue checking this
-            # rule.
-            return True, None
-
-        if self._any_conditions_met():
-            # Some conditions met from exclude_conditions. It does not
+        if self.get_skip_reason(obj, conditions=conditions) is not None:
+            # Conditions not met or exclusion conditions met. It does not
             # continue checking this rule.
             return True, None
 
-        for instance in self.obj if isinstance(obj, QuerySet) else [self.obj]:
-            if not self.check_field_rule(instance):
-                logger.warning(
-                    f"Instance {instance}-pk[{instance.pk}] is not mutable for [{action}] action. {self.__str__()}"
-                )
-                self.failed_instances.append(instance)
-        is_mutable = False if self.failed_instances else True
-        return is_mutable, self.failed_instances
+        if isinstance(obj, QuerySet):
+            if report_all is None:
+                report_all = get_setting('REPORT_ALL_FAILED_INSTANCES')
+            failed_instances = self._get_queryset_failed_instances(
+                obj, report_all, compiled=compiled
+            )
+        else:
+            failed_instances = [obj] if not self._check_instance(obj) else []
+            if not failed_instances:
+                failed_instances = self.get_ancestors_failed_instances([obj])
+        for instance in failed_instances:
+            # Formatted only if the record is emitted.
+            logger.warning(
+                "Instance %s-pk[%s] is not mutable for [%s] action. %s",
+                instance,
+                instance.pk,
+                action,
+                self,
+            )
+        is_mutable = False if failed_instances else True
+        return is_mutable, failed_instances
+
+    def get_skip_reason(self, obj, conditions=None):
+        """
+        Name of the conditions by which the rule is not applied to obj (e.g.
+        "inst_conditions"), None if the rule is applied.
+        :param obj: MutableModel|QuerySet
+        :param conditions: dict where the result of each condition is kept
+        by (condition, obj), so a condition shared by many rules is checked
+        once in a validation pass.
+        :return: str|None
+        """
+        prefix = 'queryset' if isinstance(obj, QuerySet) else 'inst'
+        if not self._all_conditions_met(obj, conditions):
+            return f'{prefix}_conditions'
+        if self._any_conditions_met(obj, conditions):
+            return f'{prefix}_exclusion_conditions'
+        return None
+
+    def _get_queryset_failed_instances(self, queryset, report_all=True, compiled=True):
+        """
+        Rows of the queryset that break the rule.
+        Row conditions (<Q> inst_conditions) narrow the queryset before the
+        rule is checked. When field_rule can be expressed as SQL only the
+        failed rows are fetched, otherwise every row is checked in Python,
+        in chunks of VALIDATION_CHUNK_SIZE rows.
+        :param report_all: all the failed rows or only the first one
+        """
+        row_q = self.get_row_q(queryset.model) if compiled else None
+        if row_q is not None:
+            failed = using_validation_database(queryset).exclude(row_q)
+            return list(failed if report_all else failed[:1])
+        queryset = using_validation_database(self._filter_row_conditions(queryset))
+        queryset = _undefer(queryset, self.get_instance_fields(queryset.model))
+        # Verdicts of related objects shared by the rows.
+        verdicts = {}
+        failed_instances = []
+        for chunk in _iter_chunks(queryset, get_setting('VALIDATION_CHUNK_SIZE')):
+            self.check_generic_objects(chunk, verdicts)
+            ancestors_failed = {
+                id(instance) for instance in self.get_ancestors_failed_instances(chunk)
+            }
+            for instance in chunk:
+                if id(instance) in ancestors_failed or not self._check_instance(
+                    instance, verdicts=verdicts
+                ):
+                    failed_instances.append(instance)
+                    if not report_all:
+                        return failed_instances
+        return failed_instances
+
+    def _check_instance(self, instance, verdicts=None):
+        """
+        check_field_rule for an instance, through the verdict cache.
+        """
+        return self._get_shared_verdict(
+            instance.__class__,
+            instance.pk,
+            self.field_rule.split('__'),
+            lambda: self.check_field_rule(instance, verdicts=verdicts),
+        )
+
+    def _get_shared_verdict(self, model, pk, field_parts, check):
+        """
+        Verdict of the rule for the row pk of model, shared by processes
+        through the verdict cache (setting VERDICT_CACHE). check() is called
+        if the verdict is not cached.
+        """
+        cache_key = get_verdict_key(model, pk, self, field_parts)
+        if cache_key is None:
+            return check()
+        verdict = get_verdict(cache_key)
+        if verdict is None:
+            verdict = check()
+            set_verdict(cache_key, model, verdict)
+        return verdict
 
-    def check_field_rule(self, model_instance, field_parts=None):
+    def get_instance_fields(self, model):
+        """
+        Attnames of the local fields read from the instances of model when
+        the rule is checked in Python: the forward relation of field_rule, or
+        the content type and object id of a GenericForeignKey.
+        The value of a local field_rule is read with saved_value().
+        :return: set
+        """
+        opts = model._meta
+        try:
+            field = opts.get_field(self.field_rule.split('__')[0])
+        except FieldDoesNotExist:
+            return set()
+        if _is_generic_foreign_key(field):
+            return {
+                opts.get_field(field.ct_field).attname,
+                opts.get_field(field.fk_field).attname,
+            }
+        if self._is_forward_relation(field) and field.concrete:
+            return {field.attname}
+        return set()
+
+    def get_queryset_q(self, queryset, conditions=None):
+        """
+        Build the Q object that matches the rows of queryset allowed by the
+        rule. queryset_conditions are checked once against the whole queryset,
+        if the rule is not applied every row is allowed (empty Q).
+        Return None if field_rule can not be expressed as SQL.
+        :param queryset: QuerySet
+        :return: Q|None
+        """
+        if self.get_skip_reason(queryset, conditions=conditions) is not None:
+            return Q()
+        return self.get_row_q(queryset.model)
+
+    def get_instance_q(self, instance, conditions=None):
+        """
+        Build the Q object that matches the row of instance if it is allowed
+        by the rule. Instance methods conditions are checked in memory, <Q>
+        conditions are part of the returned Q object. If the rule is not
+        applied the row is allowed (empty Q).
+        Return None if field_rule can not be expressed as SQL.
+        :param instance: MutableModel
+        :return: Q|None
+        """
+        if not self._method_conditions_met(instance, conditions):
+            return Q()
+        return self.get_row_q(instance.__class__)
+
+    def get_failed_instances(self, instances, conditions=None):
+        """
+        Instances (of the same model) that break the rule, checked together:
+        instance methods conditions in memory and one query for all of them
+        if field_rule can be expressed as SQL, otherwise instance by instance.
+        :param instances: [MutableModel]
+        :return: [MutableModel]
+        """
+        instances = [
+            instance
+            for instance in instances
+            if self._method_conditions_met(instance, conditions)
+        ]
+        if not instances:
+            return []
+        model = instances[0].__class__
+        row_q = self.get_row_q(model)
+        if row_q is None:
+            verdicts = {}
+            load_deferred_fields(instances, self.get_instance_fields(model))
+            instances = [
+                instance
+                for instance in instances
+                if self.get_skip_reason(instance, conditions=conditions) is None
+            ]
+            self.check_generic_objects(instances, verdicts)
+            failed_ids = {
+                id(instance)
+                for instance in self.get_ancestors_failed_instances(instances)
+            }
+            for instance in instances:
+                if id(instance) in failed_ids:
+                    continue
+                if not self._check_instance(instance, verdicts=verdicts):
+                    failed_ids.add(id(instance))
+            return [instance for instance in instances if id(instance) in failed_ids]
+        queryset = model._base_manager.filter(
+            pk__in=[instance.pk for instance in instances]
+        )
+        failed_pks = set(
+            using_validation_database(queryset)
+            .exclude(row_q)
+            .values_list('pk', flat=True)
+        )
+        return [instance for instance in instances if instance.pk in failed_pks]
+
+    def get_ancestors_failed_instances(self, instances):
+        """
+        Instances (of the same model) with an ancestor that breaks the rule,
+        when the rule has ancestors: one query for all of them, their
+        parents checked with a recursive CTE. Ancestors are read from the
+        DB, the parent of an instance is its current one.
+        :param instances: [MutableModel]
+        :return: [MutableModel]
+        """
+        if self.ancestors is None or not instances:
+            return []
+        model = instances[0].__class__
+        parent_field, field = get_ancestors_fields(model, self)
+        parent_pks = {getattr(instance, parent_field.attname) for instance in instances}
+        parent_pks.discard(None)
+        if not parent_pks:
+            return []
+        # The parent is mutable and so are its own ancestors.
+        parent_q = self.get_mutable_q(model) & get_ancestors_q(
+            model, self, max_depth=get_max_depth(self) - 1
+        )
+        queryset = model._base_manager.filter(pk__in=parent_pks).exclude(parent_q)
+        failed_pks = set(
+            using_validation_database(queryset).values_list('pk', flat=True)
+        )
+        return [
+            instance
+            for instance in instances
+            if getattr(instance, parent_field.attname) in failed_pks
+        ]
+
+    def _method_conditions_met(self, instance, conditions=None):
+        """
+        Check the instance methods conditions (not the <Q> ones), the rule is
+        applied to instance if they are met.
+        """
+        if not all(
+            self._check_inst_codition(instance, condition, conditions)
+            for condition in self.inst_conditions
+            if not isinstance(condition, Q)
+        ):
+            return False
+        return not any(
+            self._check_inst_codition(instance, condition, conditions)
+            for condition in self.inst_exclusion_conditions
+            if not isinstance(condition, Q)
+        )
+
+    def get_row_q(self, model):
+        """
+        Build the Q object that matches the rows of model allowed by the rule:
+        rows out of the row conditions (<Q> inst_conditions) or in mutable
+        state, with their ancestors if the rule has ancestors. Return None if
+        field_rule can not be expressed as SQL.
+        :param model: MutableModel class
+        :return: Q|None
+        """
+        mutable_q = self.get_mutable_q(model)
+        if mutable_q is None:
+            return None
+        if self.ancestors is not None:
+            mutable_q &= get_ancestors_q(model, self)
+        row_q = [mutable_q]
+        for condition in self.inst_conditions:
+            if isinstance(condition, Q):
+                row_q.append(~condition)
+        for condition in self.inst_exclusion_conditions:
+            if isinstance(condition, Q):
+                row_q.append(condition)
+        return reduce(operator.or_, row_q)
+
+    def _filter_row_conditions(self, queryset):
+        for condition in self.inst_conditions:
+            if isinstance(condition, Q):
+                queryset = queryset.filter(condition)
+        exclusion_conditions = [
+            condition
+            for condition in self.inst_exclusion_conditions
+            if isinstance(condition, Q)
+        ]
+        if exclusion_conditions:
+            queryset = queryset.exclude(reduce(operator.or_, exclusion_conditions))
+        return queryset
+
+    def get_mutable_q(self, model, field_parts=None):
+        """
+        Build the Q object that matches the rows of model in mutable state.
+        Same semantics as check_field_rule: an empty relation is mutable.
+        Relations with many related objects (reverse and many to many) are
+        mutable if NOT EXISTS a related object in immutable state.
+        Return None if field_rule can not be expressed as SQL (e.g. unknown
+        fields).
+        :param model: MutableModel class
+        :param field_parts: name of the field or related object field
+        :return: Q|None
+        """
+        field_parts = field_parts or self.field_rule.split('__')
+        opts = model._meta
+        mutable_q = []
+        for index, field_name in enumerate(field_parts):
+            try:
+                field = opts.get_field(field_name)
+            except FieldDoesNotExist:
+                return None
+            if self._is_many_relation(field) and index < len(field_parts) - 1:
+                many_q = self._get_many_relation_q(field, field_parts[index + 1 :])
+                if many_q is None:
+                    return None
+                if index:
+                    # Relation reached through forward relations.
+                    prefix = '__'.join(field_parts[:index])
+                    many_q = Q(
+                        **{f"{prefix}__in": opts.model._base_manager.filter(many_q)}
+                    )
+                mutable_q.append(many_q)
+                return reduce(operator.or_, mutable_q)
+            if field.is_relation and not self._is_forward_relation(field):
+                return None
+            lookup = '__'.join(field_parts[: index + 1])
+            if field.is_relation and index < len(field_parts) - 1:
+                mutable_q.append(Q(**{f"{lookup}__isnull": True}))
+                opts = field.related_model._meta
+            else:
+                values = [value for value in self._ordered_values if value is not None]
+                if values:
+                    mutable_q.append(Q(**{f"{lookup}__in": values}))
+                if len(values) < len(self._ordered_values):
+                    mutable_q.append(Q(**{f"{lookup}__isnull": True}))
+                return reduce(operator.or_, mutable_q)
+
+    def _get_many_relation_q(self, relation, rel_parts):
+        """
+        Q object that matches the rows with no related object (through
+        relation) in immutable state, as a correlated NOT EXISTS subquery.
+        """
+        related_model = relation.related_model
+        related_q = self.get_mutable_q(related_model, rel_parts)
+        if related_q is None:
+            return None
+        if _is_generic_relation(relation):
+            outer_q = {
+                relation.object_id_field_name: OuterRef('pk'),
+                relation.content_type_field_name: relation.get_content_type(),
+            }
+        else:
+            outer_q = {f"{relation.remote_field.name}__pk": OuterRef('pk')}
+        immutable_related = related_model._default_manager.filter(**outer_q).exclude(
+            related_q
+        )
+        return Q(~Exists(immutable_related))
+
+    def check_field_rule(
+        self, model_instance, field_parts=None, verdicts=None, loaded=False
+    ):
+        """
+        Check if model_instance is in mutable state.
+        :param verdicts: dict, verdicts of related objects already checked in
+        the validation pass.
+        :param loaded: model_instance was prefetched by the caller, its
+        unchanged fields are read from memory instead of saved_value().
+        :return: bool
+        """
         field_parts = field_parts or self.field_rule.split('__')
+        verdicts = {} if verdicts is None else verdicts
         opts = model_instance._meta
 
         for field_name in field_parts:
@@ -157,20 +654,95 @@ class MutabilityRule:
             except FieldDoesNotExist:
                 logger.warning(gettext_lazy(f"Field does not exist - {field_name}"))
                 return True
+            if _is_generic_foreign_key(rel):
+                rel_parts = field_parts[field_parts.index(field_name) + 1 :]
+                return self._check_generic_foreign_key(
+                    model_instance, rel, rel_parts, verdicts
+                )
             if isinstance(rel, (RelatedField, ForeignObjectRel)):
                 # field is forward or reverse relation
                 rel_parts = field_parts[field_parts.index(field_name) + 1 :]
+                to_pk = self._is_forward_relation(rel) and rel.target_field.primary_key
                 if isinstance(rel, ForeignObjectRel):
                     field_name = rel.get_accessor_name()
-                field_val = getattr(model_instance, field_name)
-                return self._is_mutable_relation(rel, field_val, rel_parts)
+
+                def check_relation():
+                    field_val = self._get_relation_value(
+                        model_instance, rel, field_name
+                    )
+                    return self._is_mutable_relation(
+                        rel, field_val, rel_parts, verdicts
+                    )
+
+                if rel_parts and to_pk:
+                    # Related object already checked (in the validation pass
+                    # or by another process), no need to load it.
+                    related_pk = getattr(model_instance, rel.attname)
+                    verdict_key = (rel.related_model, related_pk, tuple(rel_parts))
+                    if verdict_key not in verdicts:
+                        verdicts[verdict_key] = self._get_shared_verdict(
+                            rel.related_model, related_pk, rel_parts, check_relation
+                        )
+                    return verdicts[verdict_key]
+                return check_relation()
             else:
                 # field is model attribute
-                field_val = model_instance.saved_value(field_name)
-                # field_val = getattr(model_instance, field_name, None)
-                return field_val in self.values
+                if loaded and not _has_changed(model_instance, rel.attname):
+                    field_val = getattr(model_instance, rel.attname)
+                else:
+                    field_val = model_instance.saved_value(field_name)
+                return self.has_value(field_val)
+
+    @staticmethod
+    def _get_relation_value(model_instance, relation, accessor_name):
+        """
+        Related object(s) of model_instance read from the validation database.
+        Related objects already cached in model_instance are reused.
+        """
+        alias = get_validation_database()
+        if alias is None:
+            return getattr(model_instance, accessor_name)
+        if relation.many_to_many or relation.one_to_many:
+            return getattr(model_instance, accessor_name).db_manager(alias)
+        if _is_generic_foreign_key(relation) and not relation.is_cached(model_instance):
+            related_model, related_pk = _get_generic_key(model_instance, relation)
+            if related_model is None:
+                return None
+            return (
+                related_model._base_manager.db_manager(
+                    alias, hints={'instance': model_instance}
+                )
+                .filter(pk=related_pk)
+                .first()
+            )
+        if relation.is_cached(model_instance) or not isinstance(relation, RelatedField):
+            return getattr(model_instance, accessor_name)
+        related_pk = getattr(model_instance, relation.attname)
+        if related_pk is None:
+            return None
+        return (
+            relation.related_model._base_manager.db_manager(
+                alias, hints={'instance': model_instance}
+            )
+            .filter(**{relation.target_field.attname: related_pk})
+            .first()
+        )
 
-    def _is_mutable_relation(self, relation, value, rel_parts):
+    @staticmethod
+    def _is_many_relation(field):
+        if _is_generic_relation(field):
+            return True
+        return isinstance(field, (ForeignObjectRel, ManyToManyField)) and (
+            field.one_to_many or field.many_to_many
+        )
+
+    @staticmethod
+    def _is_forward_relation(field):
+        return isinstance(field, RelatedField) and (
+            field.many_to_one or field.one_to_one
+        )
+
+    def _is_mutable_relation(self, relation, value, rel_parts, verdicts):
         """
         Relation is mutable if related object(s) has mutable state.
         If related object is not defined relation is mutable by default.
@@ -180,60 +752,350 @@ class MutabilityRule:
         :param relation: ForeignObjectRel|RelatedField
         :param value: related object
         :param rel_parts: name of the field or related object field
+        :param verdicts: dict, verdicts of related objects
         :return: bool
         """
         if not rel_parts:
-            return value in self.values
+            return self.has_value(value)
         if not value:
             return True
         if relation.many_to_many or relation.one_to_many:
+            related_objects = value.all()
+            if related_objects._result_cache is not None:
+                # prefetch_related(), no query.
+                return all(
+                    self._check_related_object(
+                        related_object, rel_parts, verdicts, loaded=True
+                    )
+                    for related_object in related_objects
+                )
+            related_q = self.get_mutable_q(relation.related_model, rel_parts)
+            if related_q is not None:
+                return not related_objects.exclude(related_q).exists()
             for related_object in value.all():
-                if not self.check_field_rule(related_object, field_parts=rel_parts):
+                if not self._check_related_object(related_object, rel_parts, verdicts):
                     return False
             return True
         else:
-            return self.check_field_rule(value, field_parts=rel_parts)
+            return self._check_related_object(value, rel_parts, verdicts)
+
+    def _check_generic_foreign_key(self, model_instance, field, rel_parts, verdicts):
+        """
+        Check the object of the GenericForeignKey field of model_instance, a
+        forward relation to the model of its content type. An unset or
+        missing object is mutable.
+        """
+        if not rel_parts:
+            return self.has_value(
+                self._get_relation_value(model_instance, field, field.name)
+            )
+        related_model, related_pk = _get_generic_key(model_instance, field)
+        if related_model is None:
+            return True
+
+        def check_relation():
+            related_object = self._get_relation_value(model_instance, field, field.name)
+            if related_object is None:
+                return True
+            return self._check_related_object(related_object, rel_parts, verdicts)
+
+        verdict_key = (related_model, related_pk, tuple(rel_parts))
+        if verdict_key not in verdicts:
+            verdicts[verdict_key] = self._get_shared_verdict(
+                related_model, related_pk, rel_parts, check_relation
+            )
+        return verdicts[verdict_key]
+
+    def check_generic_objects(self, instances, verdicts):
+        """
+        Check together the objects of a GenericForeignKey field_rule (e.g.
+        'content_object__state') of instances, one query by content type.
+        Verdicts are kept in verdicts for check_field_rule, objects already
+        checked in the validation pass are not loaded again.
+        :param instances: [MutableModel] of the same model
+        :param verdicts: dict, verdicts of related objects
+        """
+        field_parts = self.field_rule.split('__')
+        if not instances or len(field_parts) < 2:
+            return
+        try:
+            field = instances[0]._meta.get_field(field_parts[0])
+        except FieldDoesNotExist:
+            return
+        if not _is_generic_foreign_key(field):
+            return
+        rel_parts = field_parts[1:]
+        related_pks = {}
+        for instance in instances:
+            related_model, related_pk = _get_generic_key(instance, field)
+            if related_model is None:
+                continue
+            if (related_model, related_pk, tuple(rel_parts)) not in verdicts:
+                related_pks.setdefault(related_model, set()).add(related_pk)
+        alias = get_validation_database()
+        for related_model, pks in related_pks.items():
+            manager = related_model._base_manager
+            if alias is not None:
+                manager = manager.db_manager(alias)
+            for related_object in manager.filter(pk__in=pks):
+                # Just loaded, its fields are read from memory.
+                self._check_related_object(
+                    related_object, rel_parts, verdicts, loaded=True
+                )
+                pks.discard(related_object.pk)
+            for related_pk in pks:
+                # Missing object, mutable as an empty relation.
+                verdicts[(related_model, related_pk, tuple(rel_parts))] = True
+
+    def _check_related_object(self, related_object, rel_parts, verdicts, loaded=False):
+        """
+        check_field_rule for a related object, memoized by (model, pk,
+        rel_parts) so objects shared by many instances are checked once in a
+        validation pass.
+        """
+        verdict_key = (related_object.__class__, related_object.pk, tuple(rel_parts))
+        if verdict_key not in verdicts:
+            verdicts[verdict_key] = self.check_field_rule(
+                related_object, field_parts=rel_parts, verdicts=verdicts, loaded=loaded
+            )
+        return verdicts[verdict_key]
+
+    def _check_inst_codition(self, instance, condition, conditions=None):
+        """
+        :param conditions: dict, results of the validation pass by
+        (condition, id(instance)), the instance lives as long as the pass.
+        """
+        key = (condition, id(instance))
+        if conditions is not None and key in conditions:
+            return conditions[key]
+        if isinstance(condition, Q):
+            result = self._check_row_codition(instance, condition)
+        else:
+            result = condition(instance)
+        if conditions is not None:
+            conditions[key] = result
+        return result
 
-    def _check_inst_codition(self, condition):
-        return condition(self.obj)
+    def _check_row_codition(self, instance, condition):
+        """
+        <Q> conditions are checked against the row saved at DB.
+        An instance not saved yet does not meet any of them.
+        """
+        if instance.pk is None:
+            return False
+        hints = {'instance': instance}
+        return (
+            instance.__class__._base_manager.db_manager(
+                get_validation_database(), hints=hints
+            )
+            .filter(condition, pk=instance.pk)
+            .exists()
+        )
 
-    def _check_query_codition(self, condition):
-        return self.obj.__getattribute__(condition.__name__)()
+    def _check_query_codition(self, queryset, condition, conditions=None):
+        key = (condition, id(queryset))
+        if conditions is not None and key in conditions:
+            return conditions[key]
+        result = using_validation_database(queryset).__getattribute__(
+            condition.__name__
+        )()
+        if conditions is not None:
+            conditions[key] = result
+        return result
 
-    def _all_conditions_met(self):
+    def _all_conditions_met(self, obj, conditions=None):
         """
         Check if all conditions have been met
         """
-        if self.is_queryset:
+        if isinstance(obj, QuerySet):
             return all(
-                map(
-                    lambda condition: self._check_query_codition(condition),
-                    self.queryset_conditions,
-                )
+                self._check_query_codition(obj, condition, conditions)
+                for condition in self.queryset_conditions
             )
         else:
             return all(
-                map(
-                    lambda condition: self._check_inst_codition(condition),
-                    self.inst_conditions,
-                )
+                self._check_inst_codition(obj, condition, conditions)
+                for condition in self.inst_conditions
             )
 
-    def _any_conditions_met(self):
+    def _any_conditions_met(self, obj, conditions=None):
         """
         Check if any conditions have been met
         """
-        if self.is_queryset:
+        if isinstance(obj, QuerySet):
             return any(
-                map(
-                    lambda condition: self._check_query_codition(condition),
-                    self.queryset_exclusion_conditions,
-                )
+                self._check_query_codition(obj, condition, conditions)
+                for condition in self.queryset_exclusion_conditions
             )
         else:
             return any(
-                map(
-                    lambda condition: self._check_inst_codition(condition),
-                    self.inst_exclusion_conditions,
-                )
+                self._check_inst_codition(obj, condition, conditions)
+                for condition in self.inst_exclusion_conditions
             )
+
+
+def _has_changed(instance, attname):
+    """
+    Check if the field of instance may differ from the value loaded from the
+    DB: changed according to its tracker, or not tracked.
+    """
+    tracker = getattr(instance, 'tracker', None)
+    if tracker is None:
+        return True
+    try:
+        return tracker.has_changed(attname)
+    except FieldError:
+        return True
+
+
+def _is_generic_foreign_key(field):
+    """
+    Check if field is a GenericForeignKey, without importing
+    django.contrib.contenttypes that may not be installed.
+    """
+    return hasattr(field, 'ct_field') and hasattr(field, 'fk_field')
+
+
+def _is_generic_relation(field):
+    """
+    Check if field is a GenericRelation (reverse of a GenericForeignKey).
+    """
+    return isinstance(field, RelatedField) and hasattr(field, 'object_id_field_name')
+
+
+def _get_generic_key(instance, field):
+    """
+    Model and pk of the object of the GenericForeignKey field of instance,
+    (None, None) if it is not set or its content type has no model.
+    """
+    opts = instance._meta
+    ct_id = getattr(instance, opts.get_field(field.ct_field).attname)
+    object_id = getattr(instance, opts.get_field(field.fk_field).attname)
+    if ct_id is None or object_id is None:
+        return None, None
+    related_model = field.get_content_type(
+        id=ct_id, using=instance._state.db
+    ).model_class()
+    if related_model is None:
+        return None, None
+    return related_model, related_model._meta.pk.to_python(object_id)
+
+
+def load_deferred_fields(instances, fields):
+    """
+    Load the deferred fields (attnames) of saved instances of the same model
+    in one query, instead of one query by field and instance on first access.
+    The saved values of the field tracker are kept in sync.
+    :param fields: set of attnames
+    """
+    deferred = {}
+    for instance in instances:
+        if instance.pk is not None:
+            instance_fields = fields & instance.get_deferred_fields()
+            if instance_fields:
+                deferred[instance] = instance_fields
+    if not deferred:
+        return
+    first = next(iter(deferred))
+    model = first.__class__
+    attnames = list(set().union(*deferred.values()))
+    rows = {
+        row[0]: row[1:]
+        for row in model._base_manager.db_manager(first._state.db)
+        .filter(pk__in=[instance.pk for instance in deferred])
+        .values_list('pk', *attnames)
+    }
+    tracker_attname = getattr(getattr(model, 'tracker', None), 'attname', None)
+    for instance, instance_fields in deferred.items():
+        if instance.pk not in rows:
+            continue
+        tracker = instance.__dict__.get(tracker_attname)
+        for attname, value in zip(attnames, rows[instance.pk]):
+            if attname not in instance_fields:
+                continue
+            instance.__dict__[attname] = value
+            if tracker is not None and attname in tracker.fields:
+                tracker.saved_data[attname] = deepcopy(value)
+
+
+def _undefer(queryset, fields):
+    """
+    Queryset that loads fields (attnames) even if they were deferred with
+    only() or defer().
+    """
+    field_names, defer = queryset.query.deferred_loading
+    if not field_names or not fields:
+        return queryset
+    opts = queryset.model._meta
+    fields = fields | {opts.get_field(attname).name for attname in fields}
+    if defer:
+        queryset = queryset._chain()
+        queryset.query.deferred_loading = (frozenset(field_names) - fields, True)
+        return queryset
+    return queryset.only(*field_names, *fields)
+
+
+def _iter_chunks(queryset, chunk_size):
+    """
+    Iterate the rows of queryset with bounded memory, in lists of chunk_size
+    rows by pk (keyset pagination), rows are not kept in the queryset cache.
+    Sliced querysets are iterated with a server side cursor when available.
+    """
+    if queryset.query.is_sliced:
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1].pk
+
+
+def _intern_values(values):
+    """
+    Rule values as (values, ordered values): a frozenset shared by the rules
+    with equal values and the tuple as given. Unhashable values (e.g. lists
+    of a JSONField) are kept only as the tuple, checked by equality.
+    """
+    ordered_values = tuple(values)
+    # Types in the key, 1 == True but they are different rule values.
+    key = tuple((type(value), value) for value in ordered_values)
+    try:
+        interned = _interned_values.get(key)
+    except TypeError:
+        return ordered_values, ordered_values
+    if interned is None:
+        interned = _interned_values[key] = (frozenset(ordered_values), ordered_values)
+    return interned
+
+
+def _value_key(value):
+    """
+    Representation of a rule value stable across processes.
+    """
+    opts = getattr(value, '_meta', None)
+    if opts is not None and getattr(value, 'pk', None) is not None:
+        return f"{opts.label}:{value.pk!r}"
+    return repr(value)
+
+
+def _condition_key(condition):
+    """
+    Representation of a rule condition stable across processes.
+    """
+    if isinstance(condition, Q):
+        return str(condition)
+    condition = getattr(condition, 'fget', condition)
+    qualname = getattr(condition, '__qualname__', None)
+    if qualname is None:
+        return repr(condition)
+    return f"{condition.__module__}.{qualname}"
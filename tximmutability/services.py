@@ -1,13 +1,21 @@
 from __future__ import absolute_import, unicode_literals
 
+import hashlib
+import operator
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import reduce
 
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
 from django.db.models.base import ModelBase
 from django.db.models.query import QuerySet
 from django.utils.translation import gettext_lazy
 
+from .cache import verdict_cache
+from .db import using_validation_database, validation_database
 from .exceptions import OrMutableException
-from .rule import MutabilityRule
+from .rule import MutabilityRule, load_deferred_fields
 
 
 class BaseMutableModelAction(ABC):
@@ -17,9 +25,12 @@ class BaseMutableModelAction(ABC):
     action name and to implement is_allowed method
 
     To validate action against immutability rules call validate(rules) method
+
+    Validation reads go to the database alias "using" (or the READ_DATABASE
+    setting), e.g. a replica.
     """
 
-    def __init__(self, instance_or_queryset):
+    def __init__(self, instance_or_queryset, using=None):
         assert isinstance(instance_or_queryset, QuerySet) or isinstance(
             instance_or_queryset.__class__, ModelBase
         ), "Obj must be an instance of QuerySet or ModelBase"
@@ -28,10 +39,24 @@ class BaseMutableModelAction(ABC):
         self.model_instance = None
         if isinstance(instance_or_queryset, QuerySet):
             self.queryset = instance_or_queryset
-            self.model_name = self.queryset.model.__name__
+            self.model = self.queryset.model
         else:
             self.model_instance = instance_or_queryset
-            self.model_name = self.model_instance.__class__.__name__
+            self.model = self.model_instance.__class__
+        self.model_name = self.model.__name__
+        self.using = using
+        # Results of the current validation pass, rules are shared and
+        # stateless.
+        self.failed_instances = {}
+        # Branches of each Or not met, errors are built only if the
+        # validation fails.
+        self.or_failures = {}
+        # Results of the conditions, shared by the rules of the pass.
+        self.conditions = {}
+        # Check querysets as SQL when the rules can be expressed as SQL.
+        self.compiled = True
+        # Read and write verdicts through the verdict cache (VERDICT_CACHE).
+        self.verdict_cache = True
 
     def check_types(self, model_instance, mutability_rules):
         if not isinstance(mutability_rules, (tuple, list)):
@@ -61,23 +86,346 @@ class BaseMutableModelAction(ABC):
         :raise: ValidationError
         """
         self.check_types(self.model_instance, rules_and_coditions)
-        for rule_or_condition in rules_and_coditions:
-            if not self.rule_or_condition_met(rule_or_condition):
-                raise rule_or_condition.get_error(self.action)
+        self.conditions = {}
+        with self.validation_database():
+            if self.model_instance is not None:
+                self.load_deferred_fields(rules_and_coditions)
+            for rule_or_condition in rules_and_coditions:
+                if not self.rule_or_condition_met(rule_or_condition):
+                    raise self.get_error(rule_or_condition)
+
+    def load_deferred_fields(self, rules_and_coditions):
+        """
+        Load in one query the deferred fields of the instance read by the
+        rules applied, instead of one query by field.
+        """
+        fields = set()
+        for rule in _iter_rules(rules_and_coditions):
+            if not self.is_rule_excluded(rule):
+                fields |= rule.get_instance_fields(self.model)
+        load_deferred_fields([self.model_instance], fields)
+
+    @contextmanager
+    def validation_database(self):
+        with validation_database(
+            self.model, using=self.using, instance=self.model_instance
+        ) as alias, verdict_cache(self.verdict_cache):
+            yield alias
 
     def rule_or_condition_met(self, rule_or_condition, or_obj=None):
         if isinstance(rule_or_condition, Or):
             or_obj = rule_or_condition
-            or_obj.clear()
+            failures = self.or_failures[or_obj] = []
             for r__or__orc in or_obj.rules_or_conditions:
                 if self.rule_or_condition_met(r__or__orc, or_obj=or_obj):
                     return True
                 else:
-                    or_obj.errors.append(r__or__orc.get_error(self.action))
+                    failures.append(r__or__orc)
         else:
             return self.is_rule_met(rule_or_condition, or_obj=or_obj)
         return False
 
+    def get_error(self, rule_or_condition):
+        """
+        Error of a rule or Or not met in the current validation pass.
+        """
+        if isinstance(rule_or_condition, Or):
+            return rule_or_condition.get_error(
+                self.action,
+                [
+                    self.get_error(r__or__orc)
+                    for r__or__orc in self.or_failures.get(rule_or_condition, ())
+                ],
+            )
+        return rule_or_condition.get_error(
+            self.action, self.failed_instances.get(rule_or_condition)
+        )
+
+    def is_mutable(self, rule):
+        """
+        Check the rule against the instance or queryset of the action and
+        keep the failed instances for the error.
+        :param rule: ImmutabilityRule
+        :return: bool
+        """
+        result, failed_instances = rule.is_mutable(
+            self.model_instance or self.queryset,
+            self.action,
+            compiled=self.compiled,
+            conditions=self.conditions,
+        )
+        self.failed_instances[rule] = failed_instances
+        return result
+
+    def get_mutable_q(self, rules_and_coditions):
+        """
+        Build the Q object that matches the rows of the queryset (or the row
+        of the instance) allowed by all the rules.
+        Return None if a rule can not be expressed as SQL.
+        :param: MutableModelAction []
+        :return: Q|None
+        """
+        self.check_types(self.model_instance, rules_and_coditions)
+        mutable_q = Q()
+        for rule_or_condition in rules_and_coditions:
+            rule_q = self.rule_or_condition_q(rule_or_condition)
+            if rule_q is None:
+                return None
+            mutable_q &= rule_q
+        return mutable_q
+
+    def rule_or_condition_q(self, rule_or_condition):
+        if isinstance(rule_or_condition, Or):
+            # Or without rules is never met.
+            or_q = [Q(pk__in=[])]
+            for r__or__orc in rule_or_condition.rules_or_conditions:
+                rule_q = self.rule_or_condition_q(r__or__orc)
+                if rule_q is None:
+                    return None
+                if not rule_q:
+                    # Rule not applied, the Or is met by any row.
+                    return Q()
+                or_q.append(rule_q)
+            return reduce(operator.or_, or_q)
+        if self.is_rule_excluded(rule_or_condition):
+            return Q()
+        if self.queryset is None:
+            return rule_or_condition.get_instance_q(
+                self.model_instance, conditions=self.conditions
+            )
+        return rule_or_condition.get_queryset_q(
+            self.queryset, conditions=self.conditions
+        )
+
+    def get_failed_pks(self, rules_and_coditions):
+        """
+        Primary keys of the queryset rows that are not allowed by the rules.
+        Rules that can not be expressed as SQL are checked in Python.
+        :param: MutableModelAction []
+        :return: set
+        """
+        self.check_types(self.model_instance, rules_and_coditions)
+        failed_pks = set()
+        with self.validation_database():
+            for rule_or_condition in rules_and_coditions:
+                failed_pks |= self.rule_or_condition_failed_pks(rule_or_condition)
+        return failed_pks
+
+    def rule_or_condition_failed_pks(self, rule_or_condition):
+        queryset = using_validation_database(self.queryset)
+        if isinstance(rule_or_condition, Or):
+            failed_pks = set(queryset.values_list('pk', flat=True))
+            for r__or__orc in rule_or_condition.rules_or_conditions:
+                if not failed_pks:
+                    break
+                failed_pks &= self.rule_or_condition_failed_pks(r__or__orc)
+            return failed_pks
+        if self.is_rule_excluded(rule_or_condition):
+            return set()
+        rule_q = rule_or_condition.get_queryset_q(
+            self.queryset, conditions=self.conditions
+        )
+        if rule_q is not None:
+            if not rule_q:
+                return set()
+            return set(queryset.exclude(rule_q).values_list('pk', flat=True))
+        _, failed_instances = rule_or_condition.is_mutable(
+            self.queryset, self.action, report_all=True, conditions=self.conditions
+        )
+        return {instance.pk for instance in failed_instances or ()}
+
+    def validate_instances(self, rules_and_coditions, instances):
+        """
+        Validate many instances of the model together, like
+        get_instances_errors(), raising the error of the first rule not met.
+        Instance methods conditions are checked in memory.
+        :param instances: [MutableModel] saved instances
+        :raise: ValidationError
+        """
+        self.check_types(None, rules_and_coditions)
+        with self.validation_database():
+            for rule_or_condition in rules_and_coditions:
+                failures = self.get_rule_or_condition_failures(
+                    rule_or_condition, instances
+                )
+                if not failures:
+                    continue
+                if isinstance(rule_or_condition, Or):
+                    raise self.get_failure_error(next(iter(failures.values())))
+                failed_instances = [
+                    instance for instance in instances if instance.pk in failures
+                ]
+                raise rule_or_condition.get_error(self.action, failed_instances)
+
+    def get_instances_errors(self, rules_and_coditions, instances):
+        """
+        Errors of the rules for many instances of the model, without raising.
+        Rules are checked for all the instances together, with a query by
+        rule when it can be expressed as SQL.
+        :param instances: [MutableModel] saved instances
+        :return: {pk: [ValidationError]} of the instances not allowed
+        """
+        self.check_types(None, rules_and_coditions)
+        errors = {}
+        with self.validation_database():
+            for rule_or_condition in rules_and_coditions:
+                rule_errors = self.get_rule_or_condition_errors(
+                    rule_or_condition, instances
+                )
+                for pk, error in rule_errors.items():
+                    errors.setdefault(pk, []).append(error)
+        return errors
+
+    def get_rule_or_condition_errors(self, rule_or_condition, instances):
+        """
+        :return: {pk: ValidationError} of the instances not allowed
+        """
+        failures = self.get_rule_or_condition_failures(rule_or_condition, instances)
+        return {pk: self.get_failure_error(failure) for pk, failure in failures.items()}
+
+    def get_rule_or_condition_failures(self, rule_or_condition, instances):
+        """
+        Failures of the instances not allowed, as tuples: (rule, instance)
+        or (Or, failures of its rules). Errors are built from them with
+        get_failure_error() when needed.
+        :return: {pk: tuple}
+        """
+        if isinstance(rule_or_condition, Or):
+            failed = list(instances)
+            or_failures = {instance.pk: [] for instance in failed}
+            for r__or__orc in rule_or_condition.rules_or_conditions:
+                if not failed:
+                    break
+                failures = self.get_rule_or_condition_failures(r__or__orc, failed)
+                failed = [instance for instance in failed if instance.pk in failures]
+                for instance in failed:
+                    or_failures[instance.pk].append(failures[instance.pk])
+            return {
+                instance.pk: (rule_or_condition, tuple(or_failures[instance.pk]))
+                for instance in failed
+            }
+        if self.is_rule_excluded(rule_or_condition):
+            return {}
+        return {
+            instance.pk: (rule_or_condition, instance)
+            for instance in rule_or_condition.get_failed_instances(
+                instances, conditions=self.conditions
+            )
+        }
+
+    def get_failure_error(self, failure):
+        """
+        Error of a failure of get_rule_or_condition_failures().
+        """
+        rule_or_condition, detail = failure
+        if isinstance(rule_or_condition, Or):
+            return rule_or_condition.get_error(
+                self.action, [self.get_failure_error(f) for f in detail]
+            )
+        return rule_or_condition.get_error(self.action, [detail])
+
+    def is_rule_excluded(self, rule):
+        """
+        Check if the rule is not applied to the action regardless of the
+        state of the item.
+        :param rule: ImmutabilityRule
+        :return: bool
+        """
+        return self.get_exclusion_reason(rule) is not None
+
+    def get_exclusion_reason(self, rule):
+        """
+        Name of the rule option that excludes the rule from the action (e.g.
+        "exclude_on_update"), None if the rule is not excluded.
+        :param rule: ImmutabilityRule
+        :return: str|None
+        """
+        return None
+
+    def explain(self, rules_and_coditions, guarded=False):
+        """
+        Plan of the validation of the action. For each rule (or Or) a dict:
+        - rule: MutabilityRule|Or
+        - status: "applied" or "skipped"
+        - reason: option or conditions by which the rule is skipped
+        - mode: "memory" (no query), "sql" (one query) or "python" (queries
+          by row or related object)
+        - sql: SQL of the query that checks the rule, if any
+        - rules: plans of the rules of an Or
+        Conditions of the rules are evaluated to know if they are skipped.
+        :param guarded: the rules are added to the UPDATE statement
+        (guarded save)
+        :return: [dict]
+        """
+        self.check_types(self.model_instance, rules_and_coditions)
+        with self.validation_database():
+            return [
+                self.explain_rule_or_condition(rule_or_condition, guarded=guarded)
+                for rule_or_condition in rules_and_coditions
+            ]
+
+    def explain_rule_or_condition(self, rule_or_condition, guarded=False):
+        if isinstance(rule_or_condition, Or):
+            plans = [
+                self.explain_rule_or_condition(r__or__orc, guarded=guarded)
+                for r__or__orc in rule_or_condition.rules_or_conditions
+            ]
+            modes = {plan['mode'] for plan in plans}
+            mode = next((mode for mode in ('python', 'sql') if mode in modes), 'memory')
+            return self._get_plan(rule_or_condition, mode=mode, rules=plans)
+        reason = self.get_exclusion_reason(rule_or_condition)
+        if reason is None:
+            reason = rule_or_condition.get_skip_reason(
+                self.model_instance or self.queryset, conditions=self.conditions
+            )
+        if reason is not None:
+            return self._get_plan(
+                rule_or_condition, status='skipped', reason=reason, mode='memory'
+            )
+        if self.queryset is not None:
+            queryset = using_validation_database(self.queryset)
+            row_q = rule_or_condition.get_row_q(self.model)
+            if row_q is not None:
+                return self._get_plan(
+                    rule_or_condition, mode='sql', sql=_get_sql(queryset.exclude(row_q))
+                )
+            queryset = rule_or_condition._filter_row_conditions(queryset)
+            return self._get_plan(
+                rule_or_condition, mode='python', sql=_get_sql(queryset)
+            )
+        if guarded and self.model_instance.pk is not None:
+            instance_q = rule_or_condition.get_instance_q(
+                self.model_instance, conditions=self.conditions
+            )
+            if instance_q is not None:
+                queryset = self.model._base_manager.filter(
+                    instance_q, pk=self.model_instance.pk
+                )
+                return self._get_plan(
+                    rule_or_condition, mode='sql', sql=_get_sql(queryset)
+                )
+        return self._get_plan(rule_or_condition, mode='python')
+
+    @staticmethod
+    def _get_plan(
+        rule_or_condition,
+        status='applied',
+        reason=None,
+        mode=None,
+        sql=None,
+        rules=None,
+    ):
+        plan = {
+            'rule': rule_or_condition,
+            'status': status,
+            'reason': reason,
+            'mode': mode,
+            'sql': sql,
+        }
+        if rules is not None:
+            plan['rules'] = rules
+        return plan
+
     @abstractmethod
     def is_rule_met(self, rule, or_obj=None):
         """
@@ -91,32 +439,50 @@ class BaseMutableModelAction(ABC):
 class BaseMutableModelUpdate(BaseMutableModelAction):
     action = gettext_lazy('update')
 
-    def __init__(self, instance_or_queryset, update_fields=None):
+    def __init__(self, instance_or_queryset, update_fields=None, using=None):
         self.errors = {}
-        super(BaseMutableModelUpdate, self).__init__(instance_or_queryset)
+        super(BaseMutableModelUpdate, self).__init__(instance_or_queryset, using)
         assert (
-            bool(self.queryset) and bool(update_fields) or not bool(self.queryset)
+            self.queryset is not None and bool(update_fields) or self.queryset is None
         ), "\"update_fields\" must be set if \"queryset\" is passed."
-        self.fields_names = (
-            update_fields or self.model_instance.tracker.changed().keys()
-        )
+        if self.queryset is not None:
+            self.fields_names = update_fields
+        elif update_fields is not None:
+            # save(update_fields=...): exactly those fields, no tracker diff.
+            opts = self.model._meta
+            self.fields_names = {opts.get_field(name).column for name in update_fields}
+        else:
+            self.fields_names = self.model_instance.tracker.changed().keys()
 
     def _get_fields_names_to_exclude(self, instance, rule):
         """
         map fk field to column db, ex: django => book.autor || DB --> book.autor_id
         """
+        is_queryset = self.queryset is not None
         fields_names = (
             {f for f in rule.exclude_fields}
-            if bool(self.queryset)
+            if is_queryset
             else {instance._meta.get_field(f).column for f in rule.exclude_fields}
         )
         fr = rule.field_rule
         if "__" not in fr:  # is not field related to fk field.
-            fields_names.add(
-                fr if bool(self.queryset) else instance._meta.get_field(fr).column
-            )
+            fields_names.add(fr if is_queryset else instance._meta.get_field(fr).column)
         return fields_names
 
+    def get_exclusion_reason(self, rule):
+        """
+        Update is not checked by the rule if it is excluded on update or if
+        only the rule field or excluded fields are updated.
+        """
+        if rule.exclude_on_update:
+            return 'exclude_on_update'
+        instance = self.model_instance or self.queryset.model
+        exclude_db_column_names = self._get_fields_names_to_exclude(instance, rule)
+        # Clean fields to check.
+        if not set(self.fields_names) - exclude_db_column_names:
+            return 'exclude_fields'
+        return None
+
     def is_rule_met(self, rule, or_obj=None):
         """
         Update of the instance field for the given rule is allowed if one of
@@ -128,21 +494,9 @@ class BaseMutableModelUpdate(BaseMutableModelAction):
         :param rule: ImmutabilityRule
         :return: bool
         """
-        if rule.exclude_on_update:
+        if self.is_rule_excluded(rule):
             return True
-
-        # Todo iterar todos
-        instance = self.model_instance or self.queryset[0]
-
-        exclude_db_column_names = self._get_fields_names_to_exclude(instance, rule)
-        # Clean fields to check.
-        fields_to_check = self.fields_names - exclude_db_column_names
-        result = True
-        if fields_to_check:
-            result, failed_instances = rule.is_mutable(
-                self.model_instance or self.queryset, self.action
-            )
-        return result
+        return self.is_mutable(rule)
 
 
 class BaseMutableModelDelete(BaseMutableModelAction):
@@ -153,10 +507,12 @@ class BaseMutableModelDelete(BaseMutableModelAction):
         Delete of the instance is allowed if rule by self allow delete or
         if instance is in mutable state
         """
-        if rule.exclude_on_delete:
+        if self.is_rule_excluded(rule):
             return True
-        result, _ = rule.is_mutable(self.model_instance or self.queryset, self.action)
-        return result
+        return self.is_mutable(rule)
+
+    def get_exclusion_reason(self, rule):
+        return 'exclude_on_delete' if rule.exclude_on_delete else None
 
 
 class BaseMutableModelCreate(BaseMutableModelAction):
@@ -168,19 +524,209 @@ class BaseMutableModelCreate(BaseMutableModelAction):
         mutable state
         """
 
-        if rule.exclude_on_create:
+        if self.is_rule_excluded(rule):
             return True
-        result, _ = rule.is_mutable(self.model_instance or self.queryset, self.action)
-        return result
+        return self.is_mutable(rule)
+
+    def get_exclusion_reason(self, rule):
+        return 'exclude_on_create' if rule.exclude_on_create else None
+
+
+ACTIONS = {
+    'create': BaseMutableModelCreate,
+    'update': BaseMutableModelUpdate,
+    'delete': BaseMutableModelDelete,
+}
+
+
+def get_action(action, instance_or_queryset, fields=None, using=None):
+    """
+    Action by name ("create", "update" or "delete"). fields are the updated
+    fields of an update, every field of the model by default on querysets
+    (an update of any field).
+    """
+    try:
+        action_class = ACTIONS[action]
+    except KeyError:
+        raise ValueError(
+            f"Unknown action {action!r}, expected one of {', '.join(ACTIONS)}."
+        )
+    if action_class is BaseMutableModelUpdate:
+        if fields is None and isinstance(instance_or_queryset, QuerySet):
+            fields = [
+                field.name
+                for field in instance_or_queryset.model._meta.concrete_fields
+                if not field.primary_key
+            ]
+        return action_class(instance_or_queryset, update_fields=fields, using=using)
+    return action_class(instance_or_queryset, using=using)
+
+
+def check_mutability(objs, actions=('update', 'delete'), fields=None):
+    """
+    Verdicts of many actions on many saved objects at once, e.g. to know
+    which rows of a page can be edited or deleted. Nothing is raised when an
+    action is not allowed, a query by model, action and rule is done when
+    the rule can be expressed as SQL.
+    :param objs: [MutableModel] of the same model, verdicts are keyed by pk
+    :param actions: names of the actions ("create", "update" or "delete")
+    :param fields: updated fields, any field by default
+    :return: {pk: {action: True or [ValidationError]}}
+    :raise: ValueError if an object is not saved or objects of many models
+    are given
+    """
+    verdicts = {}
+    groups = {}
+    concrete_model = None
+    for obj in objs:
+        if obj.pk is None:
+            raise ValueError("check_mutability() objects must be saved.")
+        if concrete_model is None:
+            concrete_model = obj._meta.concrete_model
+        elif obj._meta.concrete_model is not concrete_model:
+            raise ValueError(
+                "check_mutability() objects must be of the same model, their "
+                "verdicts are keyed by pk."
+            )
+        rules = tuple(obj._mutability_rules)
+        groups.setdefault((obj.__class__, rules), []).append(obj)
+        verdicts[obj.pk] = {}
+    for (model, rules), instances in groups.items():
+        queryset = model._base_manager.filter(
+            pk__in=[instance.pk for instance in instances]
+        )
+        for action_name in actions:
+            action = get_action(action_name, queryset, fields=fields)
+            errors = action.get_instances_errors(rules, instances)
+            for instance in instances:
+                verdicts[instance.pk][action_name] = errors.get(instance.pk) or True
+    return verdicts
+
+
+def get_tracked_fields(model, rules_and_coditions):
+    """
+    Fields whose changes decide if an update of an instance is checked by
+    the rules. A field excluded by every rule applied on update (its
+    exclude_fields or local field_rule) never makes a rule apply, so it does
+    not need to be tracked.
+    :return: set of attnames
+    """
+    rules = [
+        rule for rule in _iter_rules(rules_and_coditions) if not rule.exclude_on_update
+    ]
+    if not rules:
+        return set()
+    opts = model._meta
+    excluded = None
+    for rule in rules:
+        columns = {opts.get_field(name).column for name in rule.exclude_fields}
+        if "__" not in rule.field_rule:
+            columns.add(opts.get_field(rule.field_rule).column)
+        excluded = columns if excluded is None else excluded & columns
+    return {
+        field.attname for field in opts.concrete_fields if field.column not in excluded
+    }
+
+
+def _iter_rules(rules_and_coditions):
+    for rule_or_condition in rules_and_coditions:
+        if isinstance(rule_or_condition, Or):
+            yield from _iter_rules(rule_or_condition.rules_or_conditions)
+        else:
+            yield rule_or_condition
+
+
+def _get_sql(queryset):
+    try:
+        return str(queryset.query)
+    except EmptyResultSet:
+        return None
+
+
+def validate_collected_delete(collector, exclude=None):
+    """
+    Validate the delete of every object collected by a Django Collector
+    (cascade deletes included) before anything is deleted.
+    Collected instances are validated by model like their delete(), instance
+    methods conditions checked in memory, with one query per rule when it
+    can be expressed as SQL. Fast deletes (querysets not loaded by the
+    Collector) are validated as querysets, so queryset conditions apply to
+    them instead of instance methods conditions.
+    :param collector: django.db.models.deletion.Collector
+    :param exclude: instance already validated
+    :raise: ValidationError
+    """
+    for model, instances in collector.data.items():
+        rules = getattr(model, '_mutability_rules', None)
+        instances = [obj for obj in instances if obj is not exclude]
+        if not rules or not instances:
+            continue
+        queryset = model._base_manager.using(collector.using).filter(
+            pk__in=[obj.pk for obj in instances]
+        )
+        BaseMutableModelDelete(queryset).validate_instances(rules, instances)
+    for queryset in collector.fast_deletes:
+        rules = getattr(queryset.model, '_mutability_rules', None)
+        if not rules:
+            continue
+        if exclude is not None and isinstance(exclude, queryset.model):
+            queryset = queryset.exclude(pk=exclude.pk)
+        action = BaseMutableModelDelete(queryset)
+        mutable_q = action.get_mutable_q(rules)
+        if mutable_q is not None:
+            if not mutable_q or not queryset.exclude(mutable_q).exists():
+                continue
+        # Rules checked in detail to raise the error.
+        action.validate(rules)
 
 
 class Or:
+    """
+    Met if any of its rules or conditions is met. Immutable and hashable,
+    like MutabilityRule.
+    """
+
+    __slots__ = ('rules_or_conditions', '_hash')
+
     def __init__(self, *args):
-        self.rules_or_conditions = args
-        self.errors = []
+        super().__setattr__('rules_or_conditions', args)
+        super().__setattr__('_hash', None)
 
-    def clear(self):
-        self.errors = []
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __getstate__(self):
+        return {'rules_or_conditions': self.rules_or_conditions}
+
+    def __setstate__(self, state):
+        super().__setattr__('rules_or_conditions', state['rules_or_conditions'])
+        super().__setattr__('_hash', None)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.rules_or_conditions == other.rules_or_conditions
+
+    def __hash__(self):
+        if self._hash is None:
+            super().__setattr__('_hash', hash(self.rules_or_conditions))
+        return self._hash
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}{self.rules_or_conditions!r}>"
+
+    @property
+    def fingerprint(self):
+        """
+        Digest of the rules or conditions, stable across processes.
+        """
+        fingerprints = [
+            r__or__orc.fingerprint for r__or__orc in self.rules_or_conditions
+        ]
+        return hashlib.sha1(repr(fingerprints).encode()).hexdigest()
 
-    def get_error(self, *args):
-        return OrMutableException(self.errors)
+    def get_error(self, action, errors=None):
+        return OrMutableException(errors or [])
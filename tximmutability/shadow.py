@@ -0,0 +1,158 @@
+"""
+Shadow mode: the rules of a sample of the operations are evaluated without
+being enforced, to know what they cost on real traffic before switching them
+on.
+
+For each rule the Python path (row by row, related objects loaded) and the
+compiled path (SQL) are evaluated, with their latency, number of queries and
+verdict. A record by rule is passed to the recorder (setting SHADOW_RECORDER),
+different verdicts of both paths are logged as warnings.
+"""
+
+import copy
+import logging
+import random
+import time
+
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+
+from .conf import get_setting
+from .db import get_validation_database, using_validation_database
+from .services import ACTIONS
+
+logger = logging.getLogger('tximmutability')
+
+
+def get_shadow_sample_rate(model):
+    """
+    Fraction of the operations on model evaluated in shadow mode:
+    model.shadow_sample_rate, or the SHADOW_SAMPLE_RATE setting.
+    """
+    rate = getattr(model, 'shadow_sample_rate', None)
+    return get_setting('SHADOW_SAMPLE_RATE') if rate is None else rate
+
+
+def shadow_validate(action, rules_and_conditions, shadow_rules=()):
+    """
+    Evaluate in shadow mode, for a sample of the calls, the rules of action
+    (enforced by the caller) and shadow_rules (never enforced). Nothing is
+    raised, errors of the evaluation are recorded.
+    :param action: BaseMutableModelAction
+    :return: [dict] records passed to the recorder, None if not sampled
+    """
+    rate = get_shadow_sample_rate(action.model)
+    if not rate or random.random() >= rate:
+        return None
+    action_name = next(
+        name
+        for name, action_class in ACTIONS.items()
+        if isinstance(action, action_class)
+    )
+    rules = [(rule, True) for rule in rules_and_conditions]
+    rules += [(rule, False) for rule in shadow_rules]
+    records = []
+    for rule_or_condition, enforced in rules:
+        python = _evaluate(action, rule_or_condition, compiled=False)
+        sql = _evaluate(action, rule_or_condition, compiled=True)
+        verdicts = {python['verdict'], sql['verdict']}
+        mismatch = None not in verdicts and len(verdicts) > 1
+        if mismatch:
+            logger.warning(
+                f"Shadow {action_name} of {action.model_name}: {rule_or_condition!r} "
+                f"is {python['verdict']} in Python and {sql['verdict']} in SQL."
+            )
+        records.append(
+            {
+                'model': action.model,
+                'action': action_name,
+                'rule': rule_or_condition,
+                'enforced': enforced,
+                'python': python,
+                'sql': sql,
+                'mismatch': mismatch,
+            }
+        )
+    get_shadow_recorder()(records)
+    return records
+
+
+def get_shadow_recorder():
+    """
+    Recorder of the shadow records (setting SHADOW_RECORDER), a callable or
+    its dotted path. log_shadow_records by default.
+    """
+    recorder = get_setting('SHADOW_RECORDER')
+    if recorder is None:
+        return log_shadow_records
+    if isinstance(recorder, str):
+        return import_string(recorder)
+    return recorder
+
+
+def log_shadow_records(records):
+    for record in records:
+        logger.info(
+            f"Shadow {record['action']} of {record['model'].__name__}: "
+            f"{record['rule']!r} python={record['python']} sql={record['sql']}"
+        )
+
+
+def _evaluate(action, rule_or_condition, compiled):
+    """
+    Verdict of rule_or_condition by the Python or the compiled path, with
+    its duration (seconds) and number of queries. The verdict is None if the
+    path does not apply (e.g. the rule can not be expressed as SQL).
+    """
+    # Separate validation pass, the action may be validated after.
+    action = copy.copy(action)
+    action.failed_instances = {}
+    action.or_failures = {}
+    action.conditions = {}
+    action.compiled = compiled
+    # Cached verdicts would measure cache hits, not the rule.
+    action.verdict_cache = False
+    result = {'verdict': None, 'duration': 0.0, 'queries': 0, 'error': None}
+    queries = []
+
+    def count_queries(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with action.validation_database():
+        alias = get_validation_database() or router.db_for_read(
+            action.model, instance=action.model_instance
+        )
+        start = time.perf_counter()
+        try:
+            # Savepoint, a failed query does not break the transaction.
+            with transaction.atomic(using=alias), connections[alias].execute_wrapper(
+                count_queries
+            ):
+                if compiled:
+                    result['verdict'] = _get_sql_verdict(action, rule_or_condition)
+                else:
+                    result['verdict'] = action.rule_or_condition_met(rule_or_condition)
+        except Exception as exc:
+            logger.exception(f"Shadow evaluation of {rule_or_condition!r} failed.")
+            result['error'] = repr(exc)
+        result['duration'] = time.perf_counter() - start
+    result['queries'] = len(queries)
+    return result
+
+
+def _get_sql_verdict(action, rule_or_condition):
+    mutable_q = action.rule_or_condition_q(rule_or_condition)
+    if mutable_q is None:
+        return None
+    if not mutable_q:
+        return True
+    if action.queryset is not None:
+        return (
+            not using_validation_database(action.queryset).exclude(mutable_q).exists()
+        )
+    instance = action.model_instance
+    if instance.pk is None:
+        return None
+    queryset = action.model._base_manager.filter(pk=instance.pk)
+    return using_validation_database(queryset).filter(mutable_q).exists()